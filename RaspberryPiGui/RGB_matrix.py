@@ -25,6 +25,8 @@ except:
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from src.traintrack.station_tracker import MTAStationTracker
+from src.traintrack.mta_client import MTAClient
+from src.traintrack.transport import PooledHTTPTransport
 from src.traintrack.gtfs_loader import GTFSLoader
 
 logging.basicConfig(
@@ -76,7 +78,13 @@ def initialize_tracker():
             pass
     
     logger.info("Loading MTA station data...")
-    _TRACKER = MTAStationTracker(load_gtfs=True)
+    # Keep showing the last good arrivals through brief feed outages, and reuse
+    # connections to the MTA endpoint between refreshes
+    client = MTAClient(
+        stale_while_revalidate=True,
+        transport=PooledHTTPTransport(ssl_context=_SSL_CONTEXT),
+    )
+    _TRACKER = MTAStationTracker(load_gtfs=True, mta_client=client)
     _LOADER = _TRACKER.gtfs_loader
     logger.info(f"Loaded {len(_LOADER.stations)} stations")
     return _TRACKER
@@ -88,35 +96,8 @@ def get_all_stations() -> Dict[str, str]:
     Returns: {stop_id: "Station Name (stop_id if duplicate)"}
     """
     tracker = initialize_tracker()
-    
-    # Build display names similar to original app.py logic
-    stations_cache = {}
-    name_counts = {}
-    
-    # Count how many different parent stations have each name
-    for stop_id, station in _LOADER.stations.items():
-        parent_id = _LOADER.stop_to_parent.get(stop_id, stop_id)
-        if stop_id == parent_id:  # Only count parent stations
-            name = station.name
-            if name not in name_counts:
-                name_counts[name] = []
-            name_counts[name].append((stop_id, station.latitude, station.longitude))
-    
-    # Build display names with stop_id suffix when there are duplicates
-    for stop_id, station in _LOADER.stations.items():
-        parent_id = _LOADER.stop_to_parent.get(stop_id, stop_id)
-        
-        # Only show parent stations to avoid duplicates
-        if stop_id == parent_id:
-            name = station.name
-            # If there are multiple stations with this name, add stop_id to distinguish
-            if len(name_counts.get(name, [])) > 1:
-                display = f"{name} ({stop_id})"
-            else:
-                display = name
-            stations_cache[stop_id] = display
-    
-    return stations_cache
+    # Built once per GTFS load by the library and shared by every caller
+    return tracker.gtfs_loader.station_catalog().display_names
 
 
 
@@ -151,7 +132,7 @@ def find_stop_ids(user_input: str) -> List[tuple]:
     # Try exact stop ID match (parent or child)
     try:
         station = tracker.get_station(user_input)
-        parent_id = _LOADER.stop_to_parent.get(station.stop_id, station.stop_id)
+        parent_id = tracker.gtfs_loader.stop_to_parent.get(station.stop_id, station.stop_id)
         display_name = all_stations.get(parent_id, station.name)
         return [(parent_id, display_name)]
     except ValueError:
@@ -167,7 +148,7 @@ def find_stop_ids(user_input: str) -> List[tuple]:
     result = []
     seen = set()
     for station in stations:
-        parent_id = _LOADER.stop_to_parent.get(station.stop_id, station.stop_id)
+        parent_id = tracker.gtfs_loader.stop_to_parent.get(station.stop_id, station.stop_id)
         if parent_id not in seen:
             display_name = all_stations.get(parent_id, station.name)
             result.append((parent_id, display_name))
@@ -659,8 +640,10 @@ def run_matrix(station_arg=None):
 
     print("Loading MTA data... (this may take a minute)")
     tracker = initialize_tracker()
+    # Pick up new static GTFS data without restarting the display
+    tracker.start_background_refresh()
     all_stations = get_all_stations()
-    sorted_stations = sorted(all_stations.items(), key=lambda kv: kv[1].lower())
+    sorted_stations = tracker.gtfs_loader.station_catalog().sorted_items
 
     strip = PixelStrip(LED_COUNT, LED_PIN, LED_FREQ_HZ, LED_DMA, LED_INVERT, LED_BRIGHTNESS, LED_CHANNEL)
     strip.begin()
@@ -727,7 +710,10 @@ def run_matrix(station_arg=None):
                         else:
                             print("Invalid number.")
                     else:
-                        matches = [sid for sid, disp in sorted_stations if user_input.lower() in disp.lower() or user_input.lower() == sid.lower()]
+                        # Exact stop ID first, then the library's ranked name search
+                        if user_input.upper() in all_stations:
+                            return user_input.upper()
+                        matches = [s.stop_id for s in tracker.search_stations(user_input, limit=5) if s.stop_id in all_stations]
                         if matches:
                             return matches[0]
                         else:
@@ -1016,8 +1002,10 @@ def run_matrix(station_arg=None):
                 if consecutive_errors >= max_consecutive_errors:
                     logger.error(f"Too many consecutive errors. Restarting tracker...")
                     global _TRACKER
+                    tracker.cleanup()  # Stops the old tracker's background refresh
                     _TRACKER = None  # Force reload
                     tracker = initialize_tracker()
+                    tracker.start_background_refresh()
                     consecutive_errors = 0
                 
                 clear()
@@ -59,35 +59,8 @@ def get_all_stations() -> Dict[str, str]:
     Returns: {stop_id: "Station Name (stop_id if duplicate)"}
     """
     tracker = initialize_tracker()
-    
-    # Build display names similar to original app.py logic
-    stations_cache = {}
-    name_counts = {}
-    
-    # Count how many different parent stations have each name
-    for stop_id, station in _LOADER.stations.items():
-        parent_id = _LOADER.stop_to_parent.get(stop_id, stop_id)
-        if stop_id == parent_id:  # Only count parent stations
-            name = station.name
-            if name not in name_counts:
-                name_counts[name] = []
-            name_counts[name].append((stop_id, station.latitude, station.longitude))
-    
-    # Build display names with stop_id suffix when there are duplicates
-    for stop_id, station in _LOADER.stations.items():
-        parent_id = _LOADER.stop_to_parent.get(stop_id, stop_id)
-        
-        # Only show parent stations to avoid duplicates
-        if stop_id == parent_id:
-            name = station.name
-            # If there are multiple stations with this name, add stop_id to distinguish
-            if len(name_counts.get(name, [])) > 1:
-                display = f"{name} ({stop_id})"
-            else:
-                display = name
-            stations_cache[stop_id] = display
-    
-    return stations_cache
+    # Built once per GTFS load by the library and shared by every caller
+    return tracker.gtfs_loader.station_catalog().display_names
 
 
 
@@ -122,7 +95,7 @@ def find_stop_ids(user_input: str) -> List[tuple]:
     # Try exact stop ID match (parent or child)
     try:
         station = tracker.get_station(user_input)
-        parent_id = _LOADER.stop_to_parent.get(station.stop_id, station.stop_id)
+        parent_id = tracker.gtfs_loader.stop_to_parent.get(station.stop_id, station.stop_id)
         display_name = all_stations.get(parent_id, station.name)
         return [(parent_id, display_name)]
     except ValueError:
@@ -138,7 +111,7 @@ def find_stop_ids(user_input: str) -> List[tuple]:
     result = []
     seen = set()
     for station in stations:
-        parent_id = _LOADER.stop_to_parent.get(station.stop_id, station.stop_id)
+        parent_id = tracker.gtfs_loader.stop_to_parent.get(station.stop_id, station.stop_id)
         if parent_id not in seen:
             display_name = all_stations.get(parent_id, station.name)
             result.append((parent_id, display_name))
@@ -368,7 +341,7 @@ def run_gui():
         results_lb.pack(fill="both", expand=True, padx=8, pady=(0,8))
 
         # Populate with all stations (display names)
-        sorted_stations = sorted(all_stations.items(), key=lambda kv: kv[1].lower())
+        sorted_stations = tracker.gtfs_loader.station_catalog().sorted_items
         for stop_id, display in sorted_stations:
             results_lb.insert("end", display)
 
@@ -379,8 +352,10 @@ def run_gui():
                 for stop_id, display in sorted_stations:
                     results_lb.insert("end", display)
                 return
-            for stop_id, display in sorted_stations:
-                if q in display.lower():
+            # Ranked lookup from the library's prebuilt name index
+            for station in tracker.search_stations(q, limit=50):
+                display = all_stations.get(station.stop_id)
+                if display:
                     results_lb.insert("end", display)
 
         search_entry.bind("<Return>", do_search)
@@ -475,10 +450,7 @@ def run_gui():
                 stop_id = display[display.rfind("(")+1:-1].strip()
             else:
                 # find by matching display name -> pick parent stop_id
-                for sid, disp in sorted_stations:
-                    if disp == display:
-                        stop_id = sid
-                        break
+                stop_id = tracker.gtfs_loader.station_catalog().stop_ids_by_display.get(display)
             if not stop_id:
                 return
             selected["stop_id"] = stop_id
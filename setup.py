@@ -37,6 +37,9 @@ setup(
         "google-transit-realtime-bindings>=0.2.9",
         "protobuf>=3.17.0",
     ],
+    entry_points={
+        "console_scripts": ["traintrack-server=traintrack.server:main"],
+    },
     extras_require={
         "dev": ["pytest>=6.0", "black", "flake8"],
     },
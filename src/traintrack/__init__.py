@@ -2,17 +2,25 @@
 
 __version__ = "0.1.0"
 
-from .models import Station, Train, Alert, StationData
+from .models import Station, Train, Alert, StationData, StationCatalog, FeedHealth
 from .station_tracker import MTAStationTracker
 from .gtfs_loader import GTFSLoader
 from .mta_client import MTAClient
+from .async_client import AsyncMTAClient
+from .async_tracker import AsyncMTAStationTracker
+from .transport import PooledHTTPTransport
 
 __all__ = [
     "MTAStationTracker",
+    "AsyncMTAStationTracker",
     "GTFSLoader",
     "MTAClient",
+    "AsyncMTAClient",
+    "PooledHTTPTransport",
     "Station",
     "Train",
     "Alert",
     "StationData",
+    "StationCatalog",
+    "FeedHealth",
 ]
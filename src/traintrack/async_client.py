@@ -0,0 +1,250 @@
+"""Asyncio variant of the MTA GTFS-Realtime client."""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from .models import Train, Alert
+from .mta_client import MTAClient, MTA_FEEDS
+from .transport import TransportResponse
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMTAClient(MTAClient):
+    """
+    Fetches and parses MTA GTFS-Realtime data without blocking the event loop.
+
+    Shares the cache, conditional GET, circuit breaker and parsed feed indexes with
+    MTAClient; only the network layer is asynchronous. Protobuf parsing runs on the
+    worker pool. One client should be used from a single event loop.
+
+    By default requests go through the synchronous transport (urlopen, or transport=)
+    on the worker pool. Pass async_transport= to use a native asyncio HTTP client:
+    any object with ``async get(url, headers=None, timeout=10.0) -> TransportResponse``.
+    """
+
+    def __init__(self, *args, async_transport=None, **kwargs):
+        """
+        Initialize the client.
+
+        Args:
+            async_transport: Optional asyncio transport (see class docstring).
+            *args, **kwargs: Passed to MTAClient.
+        """
+        super().__init__(*args, **kwargs)
+        self._async_transport = async_transport
+        self._async_inflight: Dict[tuple, asyncio.Task] = {}
+        self._background_tasks: set = set()  # Keeps stale-while-revalidate refresh tasks alive
+
+    async def get_arrivals_for_stop(
+        self,
+        stop_id: str,
+        feed_urls: List[str] = None,
+        related_stop_ids: List[str] = None,
+        deadline: Optional[float] = None,
+    ) -> List[Train]:
+        """
+        Get real-time arrivals for a stop.
+
+        Args:
+            stop_id: GTFS stop ID (e.g., "127" for Times Sq).
+            feed_urls: Optional list of specific feed URLs to query. If None, queries all.
+            related_stop_ids: Optional list of related stop IDs (platforms) to include.
+            deadline: Seconds to wait for feed fetches (defaults to fetch_deadline).
+
+        Returns:
+            List of Train objects sorted by arrival time.
+        """
+        stop_ids = related_stop_ids if related_stop_ids else [stop_id]
+        arrivals = await self.get_arrivals_for_stops({stop_id: stop_ids}, feed_urls=feed_urls, deadline=deadline)
+        return arrivals[stop_id]
+
+    async def get_arrivals_for_stops(
+        self,
+        stop_groups: Dict[str, Iterable[str]],
+        feed_urls: List[str] = None,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, List[Train]]:
+        """
+        Get real-time arrivals for many stops in one pass.
+
+        Args:
+            stop_groups: Mapping of caller key (e.g., station stop_id) -> stop IDs whose
+                arrivals belong to that key (parent + platforms).
+            feed_urls: Optional list of specific feed URLs to query. If None, queries all.
+            deadline: Seconds to wait for feed fetches (defaults to fetch_deadline).
+
+        Returns:
+            Dictionary of key -> Train objects sorted by arrival time.
+        """
+        if feed_urls is None:
+            feed_urls = list(MTA_FEEDS.values())
+
+        feeds = await self._fetch_feeds_async(feed_urls, deadline)
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(self._get_executor(), self._get_arrivals_index, feed_url, feed_data)
+                for feed_url, feed_data in feeds.items()
+            ),
+            return_exceptions=True,
+        )
+
+        indexes = []
+        for feed_url, result in zip(feeds, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to parse feed {feed_url}: {result}")
+                continue
+            indexes.append(result)
+
+        return self._arrivals_from_indexes(stop_groups, indexes)
+
+    async def get_alerts_for_routes(self, route_ids: List[str]) -> List[Alert]:
+        """
+        Get service alerts for specific routes.
+
+        Args:
+            route_ids: List of route IDs (e.g., ["1", "2", "3"])
+
+        Returns:
+            List of Alert objects.
+        """
+        alerts: List[Alert] = []
+
+        # Alerts are in the main feed (feed 7)
+        try:
+            feed_url = MTA_FEEDS["7"]
+            feed_data = await self._fetch_feed_async(feed_url)
+            index = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), self._get_alerts_index, feed_url, feed_data
+            )
+            alerts = self._alerts_from_index(index, route_ids)
+        except Exception as e:
+            logger.warning(f"Failed to fetch alerts: {e}")
+
+        return alerts
+
+    async def _fetch_feeds_async(self, feed_urls: List[str], deadline: Optional[float] = None) -> Dict[str, bytes]:
+        """
+        Fetch several feeds concurrently, waiting at most `deadline` seconds.
+
+        Feeds that fail or miss the deadline are left out of the result. Waiting on a
+        late feed is cancelled, but its shared download keeps running and populates
+        the cache for the next call.
+
+        Returns:
+            Dictionary of feed_url -> raw bytes, in feed_urls order.
+        """
+        if not feed_urls:
+            return {}
+
+        tasks = {url: asyncio.ensure_future(self._fetch_feed_async(url)) for url in feed_urls}
+        timeout = self._fetch_deadline if deadline is None else deadline
+        await asyncio.wait(tasks.values(), timeout=timeout)
+
+        feeds: Dict[str, bytes] = {}
+        for feed_url, task in tasks.items():
+            if not task.done():
+                logger.warning(f"Feed {feed_url} missed the {timeout}s deadline")
+                task.cancel()
+                continue
+            if task.exception() is not None:
+                logger.warning(f"Failed to fetch feed {feed_url}: {task.exception()}")
+                continue
+            feeds[feed_url] = task.result()
+        return feeds
+
+    async def _fetch_feed_async(self, feed_url: str) -> bytes:
+        """
+        Fetch and cache a GTFS-Realtime feed.
+
+        Args:
+            feed_url: Full URL to the feed.
+
+        Returns:
+            Raw protobuf bytes.
+        """
+        if self._stale_while_revalidate:
+            stale = self._get_stale(feed_url)
+            if stale is not None:
+                self._revalidate_async(feed_url)
+                return stale
+
+        return await self._single_flight_async(
+            ("feed", feed_url), lambda: self._get_cached(feed_url), lambda: self._download_feed_async(feed_url)
+        )
+
+    def _revalidate_async(self, feed_url: str) -> None:
+        """Refresh a feed in a background task unless one is already running."""
+        with self._inflight_lock:
+            if feed_url in self._revalidating:
+                return
+            self._revalidating.add(feed_url)
+
+        async def refresh():
+            try:
+                await self._single_flight_async(
+                    ("feed", feed_url), lambda: self._get_cached(feed_url), lambda: self._download_feed_async(feed_url)
+                )
+            except Exception as e:
+                # The stale copy keeps being served until it passes max_staleness
+                logger.warning(f"Background refresh of {feed_url} failed: {e}")
+            finally:
+                with self._inflight_lock:
+                    self._revalidating.discard(feed_url)
+
+        task = asyncio.ensure_future(refresh())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _single_flight_async(
+        self, key: tuple, lookup: Callable[[], Optional[bytes]], produce: Callable[[], Awaitable[bytes]]
+    ) -> bytes:
+        """
+        Coroutine counterpart of MTAClient._single_flight() for one event loop.
+
+        The work runs in a task no caller owns, and every caller (the first included)
+        awaits it through asyncio.shield(), so cancelling one caller never cancels the
+        work the others are waiting for.
+        """
+        value = lookup()
+        if value is not None:
+            return value
+
+        task = self._async_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(produce())
+            self._async_inflight[key] = task
+            task.add_done_callback(lambda done: self._async_work_done(key, done))
+        return await asyncio.shield(task)
+
+    def _async_work_done(self, key: tuple, task: asyncio.Task) -> None:
+        """Forget finished single-flight work."""
+        if self._async_inflight.get(key) is task:
+            del self._async_inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved; every caller may have been cancelled
+
+    async def _download_feed_async(self, feed_url: str) -> bytes:
+        """Download a feed and store it in the cache."""
+        self._check_circuit(feed_url)
+        now, headers, previous = self._prepare_download(feed_url)
+
+        logger.debug(f"Fetching {feed_url}")
+        try:
+            response = await self._http_get_async(feed_url, headers)
+            data = self._finish_download(feed_url, response, previous, now)
+        except Exception as e:
+            logger.error(f"Failed to fetch {feed_url}: {e}")
+            self._record_failure(feed_url, e)
+            raise
+
+        self._record_success(feed_url)
+        return data
+
+    async def _http_get_async(self, feed_url: str, headers: Dict[str, str]) -> TransportResponse:
+        """GET a feed through the async transport, or the sync one on the worker pool."""
+        if self._async_transport is not None:
+            return await self._async_transport.get(feed_url, headers=headers, timeout=10)
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), self._http_get, feed_url, headers)
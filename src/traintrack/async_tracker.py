@@ -0,0 +1,148 @@
+"""Asyncio variant of the MTA Station Tracker."""
+
+import asyncio
+import concurrent.futures
+import logging
+from typing import Callable, Dict, List, Optional
+from datetime import datetime
+
+from .models import Station, StationData, Alert
+from .gtfs_loader import DEFAULT_CACHE_DIR
+from .async_client import AsyncMTAClient
+from .station_tracker import MTAStationTracker
+
+logger = logging.getLogger(__name__)
+
+POLL_TIMEOUT = 60.0  # Seconds the poller waits for a poll scheduled on the event loop
+
+
+class AsyncMTAStationTracker(MTAStationTracker):
+    """
+    MTAStationTracker whose realtime methods are coroutines.
+
+    Station lookup, search and GTFS handling are inherited unchanged (they are
+    in-memory); get_arrivals(), get_arrivals_many(), get_alerts() and
+    get_station_data() go through an AsyncMTAClient and must be awaited.
+
+    Loading GTFS on construction blocks; in a running event loop create the tracker
+    with load_gtfs=False and call load_gtfs_from_url() via run_in_executor().
+
+    subscribe() should be called from the event loop that uses the client: polls
+    then run there through the async client and share its in-flight fetches.
+    Callbacks still run on the poller thread.
+    """
+
+    def __init__(
+        self,
+        load_gtfs: bool = True,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+        mta_client: Optional[AsyncMTAClient] = None,
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            load_gtfs: If True, download and load GTFS data on init.
+            cache_dir: Directory for the GTFS index snapshot. None disables it.
+            mta_client: Async realtime client to use. Defaults to a new AsyncMTAClient().
+        """
+        super().__init__(
+            load_gtfs=load_gtfs,
+            cache_dir=cache_dir,
+            mta_client=mta_client if mta_client is not None else AsyncMTAClient(),
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # Loop the poller runs its fetches on
+
+    def subscribe(self, station_input, callback: Callable[[Station, Dict[str, List[tuple]]], None]) -> int:
+        """
+        Call back whenever a station's arrivals change (see MTAStationTracker.subscribe()).
+
+        Called from a running event loop, the poller fetches on that loop.
+        """
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        return super().subscribe(station_input, callback)
+
+    def _poll_arrivals(self, stations: List[Station]) -> Dict[str, Dict[str, List[tuple]]]:
+        """Fetch arrivals for the subscription poller through the async client."""
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            # Subscribed outside an event loop: poll on one of our own
+            return asyncio.run(self.get_arrivals_many(stations))
+        future = asyncio.run_coroutine_threadsafe(self.get_arrivals_many(stations), loop)
+        try:
+            return future.result(timeout=POLL_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            # The loop stopped or stalled; give up on this poll
+            future.cancel()
+            raise
+
+    async def get_arrivals(self, station: Station) -> Dict[str, List[tuple]]:
+        """
+        Get closest arriving trains for a station, grouped by direction and route.
+
+        Args:
+            station: Station object (from get_station()).
+
+        Returns:
+            Same format as MTAStationTracker.get_arrivals().
+        """
+        related_stop_ids = self.gtfs_loader.get_related_stop_ids(station.stop_id)
+        feed_urls = self.mta_client.feed_urls_for_routes(station.lines)
+        arrivals = await self.mta_client.get_arrivals_for_stop(
+            station.stop_id, feed_urls=feed_urls, related_stop_ids=related_stop_ids
+        )
+        return self._group_arrivals(station, arrivals)
+
+    async def get_arrivals_many(self, stations: List[Station]) -> Dict[str, Dict[str, List[tuple]]]:
+        """
+        Get closest arriving trains for several stations in one refresh.
+
+        Args:
+            stations: Station objects (from get_station()).
+
+        Returns:
+            Dictionary of station stop_id -> arrivals in the same format as get_arrivals().
+        """
+        stop_groups, feed_urls = self._batch_request(stations)
+        trains = await self.mta_client.get_arrivals_for_stops(stop_groups, feed_urls=feed_urls)
+        return {station.stop_id: self._group_arrivals(station, trains[station.stop_id]) for station in stations}
+
+    async def get_alerts(self, station: Station) -> List[Alert]:
+        """
+        Get service alerts for lines serving this station.
+
+        Args:
+            station: Station object (from get_station()).
+
+        Returns:
+            List of Alert objects.
+        """
+        if not station.lines:
+            logger.warning(f"No routes found for station {station.stop_id}")
+            return []
+
+        return await self.mta_client.get_alerts_for_routes(station.lines)
+
+    async def get_station_data(self, station_input: str) -> StationData:
+        """
+        Get complete data for a station, fetching arrivals and alerts concurrently.
+
+        Args:
+            station_input: Station ID or name.
+
+        Returns:
+            StationData object with station info, arrivals, and alerts.
+        """
+        station = self.get_station(station_input)
+        arrivals, alerts = await asyncio.gather(self.get_arrivals(station), self.get_alerts(station))
+
+        return StationData(
+            station=station,
+            trains_by_direction=arrivals,
+            alerts=alerts,
+            last_updated=datetime.now(),
+            data_age=self.mta_client.data_age(self.mta_client.feed_urls_for_routes(station.lines)),
+        )
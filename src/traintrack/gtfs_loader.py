@@ -1,87 +1,364 @@
 """GTFS static data loader for MTA subway data."""
 
 import csv
+import hashlib
 import io
+import json
+import os
+import pickle
 import ssl
-from typing import Dict, List, Set
-from urllib.request import urlopen
+import sys
+import tempfile
+from typing import BinaryIO, Dict, List, Optional, Set, TextIO, Tuple, Union
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
 import logging
 
-from .models import Station
+from .models import Station, StationCatalog
+from .search import StationSearchIndex
+from .spatial import StationGrid
 
 logger = logging.getLogger(__name__)
 
 # MTA GTFS static data URL
 MTA_GTFS_URL = "https://rrgtfsfeeds.s3.amazonaws.com/gtfs_subway.zip"
 
+# Where derived indexes are persisted between runs
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "traintrack")
+SNAPSHOT_FILENAME = "gtfs_snapshot.pickle"
+ZIP_FILENAME = "gtfs_subway.zip"
+ZIP_META_FILENAME = "gtfs_subway.json"  # ETag/Last-Modified validators for ZIP_FILENAME
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Bump whenever the snapshot layout or the derived indexes change
+SNAPSHOT_VERSION = 2
+
+
+def _csv_rows(csv_content: Union[str, TextIO]) -> csv.DictReader:
+    """Wrap CSV text or an open text stream in a DictReader."""
+    if isinstance(csv_content, str):
+        csv_content = io.StringIO(csv_content)
+    return csv.DictReader(csv_content)
+
+
+def _shared_lines(route_ids, pool: Dict[tuple, tuple]) -> tuple:
+    """Return route_ids as a sorted tuple, reusing an identical tuple from pool."""
+    key = tuple(sorted(route_ids))
+    return pool.setdefault(key, key)
+
 
 class GTFSLoader:
     """Loads and indexes MTA GTFS static data."""
 
-    def __init__(self):
-        """Initialize the GTFS loader."""
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        """
+        Initialize the GTFS loader.
+
+        Args:
+            cache_dir: Directory for the persisted index snapshot. None disables it.
+        """
+        self.cache_dir = cache_dir
+        self.source_hash: Optional[str] = None  # SHA-256 of the loaded GTFS zip
         self.stations: Dict[str, Station] = {}
         self.stations_by_name: Dict[str, List[str]] = {}  # name -> [stop_ids]
         self.routes: Dict[str, str] = {}  # route_id -> route_name
         self.stops_by_route: Dict[str, Set[str]] = {}  # route_id -> {stop_ids}
         self.parent_to_children: Dict[str, List[str]] = {}
         self.stop_to_parent: Dict[str, str] = {}
+        # Derived lookup indexes, built on first use and dropped whenever data is (re)loaded
+        self._spatial_index: Optional[StationGrid] = None
+        self._search_index: Optional[StationSearchIndex] = None
+        self._catalog: Optional[StationCatalog] = None
+
+    def load_from_url(self, url: str = MTA_GTFS_URL) -> None:
+        """
+        Download and load GTFS data from MTA S3.
+
+        If the zip cannot be fetched, the last saved snapshot is loaded instead (it may
+        be out of date), so a restart without network still has station data.
 
-    def load_from_url(self) -> None:
-        """Download and load GTFS data from MTA S3."""
-        logger.info(f"Downloading GTFS data from {MTA_GTFS_URL}")
+        Args:
+            url: GTFS static zip URL. Defaults to the MTA subway feed.
+        """
+        logger.info(f"Downloading GTFS data from {url}")
         try:
             import zipfile
 
-            # Create SSL context that doesn't verify certificates (for development)
-            ssl_context = ssl._create_unverified_context()
-            
-            with urlopen(MTA_GTFS_URL, context=ssl_context, timeout=30) as response:
-                zip_data = response.read()
-                logger.info(f"Downloaded {len(zip_data)} bytes")
-                
-                with zipfile.ZipFile(io.BytesIO(zip_data)) as zip_file:
-                    # Verify zip file integrity
-                    if zip_file.testzip() is not None:
-                        raise ValueError("Corrupt ZIP file downloaded")
-                    
+            try:
+                zip_stream, source_hash = self._download_zip(url)
+            except Exception as e:
+                if not self._load_snapshot(None):
+                    raise
+                logger.warning(
+                    f"Failed to download GTFS data ({e}); using the cached snapshot, which may be stale"
+                )
+                return
+
+            with zip_stream:
+                if self._load_snapshot(source_hash):
+                    logger.info(f"Loaded {len(self.stations)} stations and {len(self.routes)} routes from snapshot")
+                    return
+
+                # Members are decompressed and parsed row by row; ZipFile checks each
+                # member's CRC once it has been read to the end.
+                with zipfile.ZipFile(zip_stream) as zip_file:
                     logger.info("Parsing stops.txt...")
-                    self._load_stops(zip_file.read("stops.txt").decode("utf-8"))
-                    
+                    with self._open_member(zip_file, "stops.txt") as f:
+                        self._load_stops(f)
+
                     logger.info("Parsing routes.txt...")
-                    self._load_routes(zip_file.read("routes.txt").decode("utf-8"))
-                    
+                    with self._open_member(zip_file, "routes.txt") as f:
+                        self._load_routes(f)
+
+                    trip_routes = None
+                    if "trips.txt" in zip_file.namelist():
+                        logger.info("Parsing trips.txt...")
+                        with self._open_member(zip_file, "trips.txt") as f:
+                            trip_routes = self._load_trips(f)
+
                     logger.info("Parsing stop_times.txt...")
-                    self._load_stop_times(zip_file.read("stop_times.txt").decode("utf-8"))
-                    
+                    with self._open_member(zip_file, "stop_times.txt") as f:
+                        self._load_stop_times(f, trip_routes)
+
+            self.source_hash = source_hash
+            self._save_snapshot(source_hash)
+
             logger.info(f"Loaded {len(self.stations)} stations and {len(self.routes)} routes")
         except Exception as e:
             logger.error(f"Failed to load GTFS data: {e}", exc_info=True)
             raise
 
-    def load_from_files(self, stops_path: str, routes_path: str, stop_times_path: str) -> None:
-        """Load GTFS data from local CSV files."""
+    def _download_zip(self, url: str) -> Tuple[BinaryIO, str]:
+        """
+        Download the GTFS zip, revalidating against the local copy when one exists.
+
+        Sends If-None-Match/If-Modified-Since from the previous response and reuses the
+        local copy on 304 Not Modified. The body is streamed to disk in chunks and hashed
+        on the way, so the zip is never held in memory.
+
+        Args:
+            url: GTFS static zip URL.
+
+        Returns:
+            Tuple of (open binary file positioned at the start of the zip, SHA-256 hex digest).
+            The caller is responsible for closing the file.
+        """
+        # Create SSL context that doesn't verify certificates (for development)
+        ssl_context = ssl._create_unverified_context()
+
+        zip_path = os.path.join(self.cache_dir, ZIP_FILENAME) if self.cache_dir else None
+        meta_path = os.path.join(self.cache_dir, ZIP_META_FILENAME) if self.cache_dir else None
+
+        headers = {}
+        meta = self._read_zip_meta(meta_path, url)
+        if meta and os.path.exists(zip_path):
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            response = urlopen(Request(url, headers=headers), context=ssl_context, timeout=30)
+        except HTTPError as e:
+            if e.code != 304 or not headers:
+                raise
+            logger.info("GTFS data not modified, using local copy")
+            zip_stream = open(zip_path, "rb")
+            return zip_stream, meta.get("sha256") or self._hash_stream(zip_stream)
+
+        tmp_path = None
+        if zip_path:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = f"{zip_path}.tmp"
+                out = open(tmp_path, "w+b")
+            except OSError as e:
+                logger.warning(f"Failed to save local GTFS copy: {e}")
+                tmp_path = None
+        if tmp_path is None:
+            out = tempfile.TemporaryFile()
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with response as resp:
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+                for chunk in iter(lambda: resp.read(DOWNLOAD_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+        except Exception:
+            out.close()
+            raise
+
+        logger.info(f"Downloaded {size} bytes")
+        source_hash = digest.hexdigest()
+
+        if tmp_path is None:
+            out.seek(0)
+            return out, source_hash
+
+        out.close()
+        os.replace(tmp_path, zip_path)
+        try:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"url": url, "etag": etag, "last_modified": last_modified, "sha256": source_hash},
+                    f,
+                )
+        except OSError as e:
+            logger.warning(f"Failed to save GTFS metadata: {e}")
+        return open(zip_path, "rb"), source_hash
+
+    @staticmethod
+    def _hash_stream(stream: BinaryIO) -> str:
+        """SHA-256 a binary stream in chunks and rewind it."""
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: stream.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+        stream.seek(0)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _open_member(zip_file, name: str) -> TextIO:
+        """Open a zip member as a streaming UTF-8 text file for the csv module."""
+        return io.TextIOWrapper(zip_file.open(name), encoding="utf-8", newline="")
+
+    @staticmethod
+    def _read_zip_meta(meta_path: Optional[str], url: str) -> Optional[dict]:
+        """Read stored validators for url, or None if there are none."""
+        if not meta_path or not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable GTFS metadata {meta_path}: {e}")
+            return None
+        return meta if meta.get("url") == url else None
+
+    def load_from_files(
+        self, stops_path: str, routes_path: str, stop_times_path: str, trips_path: Optional[str] = None
+    ) -> None:
+        """Load GTFS data from local CSV files. trips_path is optional but improves route mapping."""
         logger.info("Loading GTFS data from local files")
-        with open(stops_path, "r") as f:
-            self._load_stops(f.read())
-        with open(routes_path, "r") as f:
-            self._load_routes(f.read())
-        with open(stop_times_path, "r") as f:
-            self._load_stop_times(f.read())
+        with open(stops_path, "r", encoding="utf-8", newline="") as f:
+            self._load_stops(f)
+        with open(routes_path, "r", encoding="utf-8", newline="") as f:
+            self._load_routes(f)
+        trip_routes = None
+        if trips_path:
+            with open(trips_path, "r", encoding="utf-8", newline="") as f:
+                trip_routes = self._load_trips(f)
+        with open(stop_times_path, "r", encoding="utf-8", newline="") as f:
+            self._load_stop_times(f, trip_routes)
         logger.info(f"Loaded {len(self.stations)} stations and {len(self.routes)} routes")
 
-    def _load_stops(self, csv_content: str) -> None:
+    def _snapshot_path(self) -> Optional[str]:
+        """Get the snapshot file path, or None if snapshots are disabled."""
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, SNAPSHOT_FILENAME)
+
+    def _load_snapshot(self, source_hash: Optional[str]) -> bool:
+        """
+        Load derived indexes from the snapshot if it was built from the same GTFS zip.
+
+        Args:
+            source_hash: SHA-256 of the GTFS zip the caller is about to parse, or None
+                to accept a snapshot of any zip (offline fallback).
+
+        Returns:
+            True if the snapshot was current and has been loaded.
+        """
+        path = self._snapshot_path()
+        if path is None or not os.path.exists(path):
+            return False
+
+        try:
+            with open(path, "rb") as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable GTFS snapshot {path}: {e}")
+            return False
+
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            logger.info("GTFS snapshot has an old layout, rebuilding")
+            return False
+        if source_hash is not None and snapshot.get("source_hash") != source_hash:
+            logger.info("GTFS snapshot is stale, rebuilding")
+            return False
+
+        line_pool: Dict[tuple, tuple] = {}
+        self.stations = {
+            stop_id: Station(
+                stop_id=stop_id,
+                name=name,
+                latitude=lat,
+                longitude=lon,
+                lines=_shared_lines(lines, line_pool),
+            )
+            for stop_id, name, lat, lon, lines in snapshot["stations"]
+        }
+        self.stations_by_name = snapshot["stations_by_name"]
+        self.routes = snapshot["routes"]
+        self.stops_by_route = snapshot["stops_by_route"]
+        self.parent_to_children = snapshot["parent_to_children"]
+        self.stop_to_parent = snapshot["stop_to_parent"]
+        self.source_hash = snapshot.get("source_hash")
+        self._invalidate_indexes()
+        return True
+
+    def _save_snapshot(self, source_hash: str) -> None:
+        """
+        Persist the derived indexes so the next start can skip parsing.
+
+        Args:
+            source_hash: SHA-256 of the GTFS zip the indexes were built from.
+        """
+        path = self._snapshot_path()
+        if path is None:
+            return
+
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "source_hash": source_hash,
+            "stations": [
+                (s.stop_id, s.name, s.latitude, s.longitude, tuple(s.lines))
+                for s in self.stations.values()
+            ],
+            "stations_by_name": self.stations_by_name,
+            "routes": self.routes,
+            "stops_by_route": self.stops_by_route,
+            "parent_to_children": self.parent_to_children,
+            "stop_to_parent": self.stop_to_parent,
+        }
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial snapshot
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            logger.info(f"Saved GTFS snapshot to {path}")
+        except OSError as e:
+            logger.warning(f"Failed to save GTFS snapshot: {e}")
+
+    def _load_stops(self, csv_content: Union[str, TextIO]) -> None:
         """Parse stops.txt and create Station objects."""
         try:
-            reader = csv.DictReader(io.StringIO(csv_content))
+            reader = _csv_rows(csv_content)
             
             # First pass: collect all stops and their parent relationships
             stops_data = []
             parent_to_children = {}  # parent_id -> [child_ids]
             
             for row in reader:
-                stop_id = row.get("stop_id", "").strip()
-                stop_name = row.get("stop_name", "").strip()
+                # Intern IDs and names so every index shares one copy of each string
+                stop_id = sys.intern(row.get("stop_id", "").strip())
+                stop_name = sys.intern(row.get("stop_name", "").strip())
                 
                 # Skip if essential fields are missing
                 if not stop_id or not stop_name:
@@ -95,7 +372,7 @@ class GTFSLoader:
                     latitude = 0.0
                     longitude = 0.0
                 
-                parent_station = row.get("parent_station", "").strip()
+                parent_station = sys.intern(row.get("parent_station", "").strip())
                 location_type = row.get("location_type", "").strip()
                 
                 stops_data.append((stop_id, stop_name, latitude, longitude, parent_station, location_type))
@@ -111,13 +388,13 @@ class GTFSLoader:
             self.stop_to_parent = {}  # stop_id -> parent_id
             
             for stop_id, stop_name, latitude, longitude, parent_station, location_type in stops_data:
-                # Create station with empty lines list (filled by _load_stop_times)
+                # Create station with no lines (filled by _load_stop_times)
                 station = Station(
                     stop_id=stop_id,
                     name=stop_name,
                     latitude=latitude,
                     longitude=longitude,
-                    lines=[],
+                    lines=(),
                 )
                 self.stations[stop_id] = station
                 
@@ -133,32 +410,69 @@ class GTFSLoader:
                     self.stations_by_name[stop_name] = []
                 self.stations_by_name[stop_name].append(stop_id)
             
+            self._invalidate_indexes()
             logger.debug(f"Loaded {len(self.stations)} stops")
             
         except Exception as e:
             logger.error(f"Error in _load_stops: {e}", exc_info=True)
             raise
 
-    def _load_routes(self, csv_content: str) -> None:
+    def _load_routes(self, csv_content: Union[str, TextIO]) -> None:
         """Parse routes.txt."""
-        reader = csv.DictReader(io.StringIO(csv_content))
+        reader = _csv_rows(csv_content)
         for row in reader:
-            route_id = row["route_id"]
+            route_id = sys.intern(row["route_id"])
             route_name = row.get("route_short_name") or row.get("route_long_name", route_id)
             self.routes[route_id] = route_name
             self.stops_by_route[route_id] = set()
 
-    def _load_stop_times(self, csv_content: str) -> None:
-        """Parse stop_times.txt to map stops to routes."""
+    def _load_trips(self, csv_content: Union[str, TextIO]) -> Dict[str, str]:
+        """Parse trips.txt into a trip_id -> route_id mapping."""
+        trip_routes: Dict[str, str] = {}
+        for row in _csv_rows(csv_content):
+            trip_id = row.get("trip_id", "").strip()
+            route_id = row.get("route_id", "").strip()
+            if trip_id and route_id:
+                trip_routes[trip_id] = route_id
+        logger.debug(f"Loaded {len(trip_routes)} trips")
+        return trip_routes
+
+    @staticmethod
+    def _route_from_trip_id(trip_id: str) -> Optional[str]:
+        """
+        Guess the route_id from an MTA trip_id.
+
+        Trip IDs have format: PREFIX_TIMESTAMP_ROUTE..DIRECTION
+        Example: "AFA25GEN-1038-Sunday-00_020600_1..S03R"
+        """
+        # Split on ".." to get the ROUTE..DIRECTION part
+        if ".." not in trip_id:
+            return None
+        # Get everything before "..", then the last segment (the route)
+        before_dots = trip_id.split("..")[0]
+        return before_dots.split("_")[-1] or None
+
+    def _load_stop_times(
+        self, csv_content: Union[str, TextIO], trip_routes: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Parse stop_times.txt to map stops to routes.
+
+        Args:
+            csv_content: stop_times.txt as a string or text stream.
+            trip_routes: Optional trip_id -> route_id mapping from trips.txt. Trips missing
+                from it fall back to parsing the route out of the trip_id.
+        """
         # stop_times.txt has: trip_id, arrival_time, departure_time, stop_id, stop_sequence
-        # Trip IDs have format: PREFIX_TIMESTAMP_ROUTE..DIRECTION
-        # Example: "AFA25GEN-1038-Sunday-00_020600_1..S03R"
-        
+        trip_routes = trip_routes or {}
+
         try:
-            reader = csv.DictReader(io.StringIO(csv_content))
+            reader = _csv_rows(csv_content)
             
             # Track routes per stop to avoid repeated lookups
             stop_routes = {}  # stop_id -> set of route_ids
+            # Resolve each trip once; every stop of a trip shares its route
+            resolved_trips: Dict[str, Optional[str]] = {}
             
             row_count = 0
             for row in reader:
@@ -172,20 +486,17 @@ class GTFSLoader:
                 if not trip_id or not stop_id:
                     continue
                 
-                # Extract route_id from trip_id
-                route_id = None
-                
-                # Split on ".." to get the ROUTE..DIRECTION part
-                if ".." in trip_id:
-                    # Get everything before ".."
-                    before_dots = trip_id.split("..")[0]
-                    # Get the last segment (the route)
-                    segments = before_dots.split("_")
-                    if segments:
-                        route_id = segments[-1]  # Last segment should be route
+                if trip_id in resolved_trips:
+                    route_id = resolved_trips[trip_id]
+                else:
+                    route_id = trip_routes.get(trip_id) or self._route_from_trip_id(trip_id)
+                    # Only keep route_ids that exist in routes.txt
+                    route_id = sys.intern(route_id) if route_id in self.routes else None
+                    resolved_trips[trip_id] = route_id
                 
-                # Verify route_id is valid
-                if route_id and route_id in self.routes:
+                if route_id:
+                    stop_id = sys.intern(stop_id)
+
                     # Add to stops_by_route
                     if route_id not in self.stops_by_route:
                         self.stops_by_route[route_id] = set()
@@ -198,23 +509,19 @@ class GTFSLoader:
             
             logger.debug(f"Processed {row_count} total stop_times rows")
             
-            # Populate stations' lines from collected route data
-            for stop_id, route_ids in stop_routes.items():
-                if stop_id in self.stations:
-                    station = self.stations[stop_id]
-                    for route_id in route_ids:
-                        if route_id not in station.lines:
-                            station.lines.append(route_id)
-            
-            # Populate parent stations from their children's routes
+            # Parent stations serve every route of their platforms
             for child_id, parent_id in self.stop_to_parent.items():
-                if child_id != parent_id and parent_id in self.stations:
-                    child_station = self.stations.get(child_id)
-                    parent_station = self.stations[parent_id]
-                    if child_station and child_station.lines:
-                        for route_id in child_station.lines:
-                            if route_id not in parent_station.lines:
-                                parent_station.lines.append(route_id)
+                if child_id != parent_id and child_id in stop_routes:
+                    if parent_id not in stop_routes:
+                        stop_routes[parent_id] = set()
+                    stop_routes[parent_id].update(stop_routes[child_id])
+            
+            # Store lines as sorted tuples shared by all stations serving the same routes
+            line_pool: Dict[tuple, tuple] = {}
+            for stop_id, route_ids in stop_routes.items():
+                station = self.stations.get(stop_id)
+                if station is not None:
+                    station.lines = _shared_lines(route_ids.union(station.lines), line_pool)
             
             logger.debug(f"Populated routes for {len(self.stations)} stations")
             
@@ -229,17 +536,158 @@ class GTFSLoader:
         return self.stations[station_id]
 
     def find_stations_by_name(self, name: str) -> List[Station]:
-        """Find stations by name (partial match)."""
+        """Find stations by name (partial match, ignoring case and punctuation)."""
         results = []
-        name_lower = name.lower()
+        for station_name in self._get_search_index().substring(name):
+            for stop_id in self.stations_by_name.get(station_name, ()):
+                results.append(self.stations[stop_id])
+        return results
 
-        for station_name, stop_ids in self.stations_by_name.items():
-            if name_lower in station_name.lower():
-                for stop_id in stop_ids:
-                    results.append(self.stations[stop_id])
+    def search_stations(self, query: str, limit: int = 10) -> List[Station]:
+        """
+        Ranked station search.
 
+        Args:
+            query: Full or partial station name (e.g., "times sq", "42 st").
+            limit: Maximum number of stations to return.
+
+        Returns:
+            Parent stations (one per station, not per platform), best match first.
+        """
+        ranked = self._get_search_index().search(query, limit)
+        return self._parents_for_names([name for name, _ in ranked])[:limit]
+
+    def fuzzy_find_stations(
+        self, query: str, limit: int = 5, min_score: float = 0.3
+    ) -> List[Tuple[Station, float]]:
+        """
+        Typo-tolerant station lookup (e.g., "Tims Sq" finds "Times Sq-42 St").
+
+        Args:
+            query: Possibly misspelled station name.
+            limit: Maximum number of stations to return.
+            min_score: Minimum similarity in (0, 1] for a candidate to be returned.
+
+        Returns:
+            List of (parent Station, score), best match first.
+        """
+        results = []
+        seen = set()
+        for name, score in self._get_search_index().fuzzy(query, limit, min_score):
+            for station in self._parents_for_names([name]):
+                if station.stop_id not in seen:
+                    seen.add(station.stop_id)
+                    results.append((station, score))
+        return results[:limit]
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[str]:
+        """
+        Complete a partially typed station name.
+
+        Args:
+            prefix: Text typed so far; each word may be partial (e.g., "tim sq").
+            limit: Maximum number of names to return.
+
+        Returns:
+            Station names, best match first.
+        """
+        return self._get_search_index().autocomplete(prefix, limit)
+
+    def _parents_for_names(self, names: List[str]) -> List[Station]:
+        """Map station names to their parent stations, keeping order and dropping duplicates."""
+        results = []
+        seen = set()
+        for name in names:
+            for stop_id in self.stations_by_name.get(name, ()):
+                parent_id = self.stop_to_parent.get(stop_id, stop_id)
+                if parent_id not in seen and parent_id in self.stations:
+                    seen.add(parent_id)
+                    results.append(self.stations[parent_id])
         return results
 
+    def _get_search_index(self) -> StationSearchIndex:
+        """Get the station name index, building it on first use."""
+        index = self._search_index
+        if index is None:
+            index = StationSearchIndex(self.stations_by_name.keys())
+            self._search_index = index
+        return index
+
+    def find_nearest_stations(
+        self, lat: float, lon: float, k: int = 5, max_distance_m: Optional[float] = None
+    ) -> List[Tuple[Station, float]]:
+        """
+        Find the stations closest to a location.
+
+        Only parent stations are returned (not their N/S platforms).
+
+        Args:
+            lat: Latitude.
+            lon: Longitude.
+            k: Maximum number of stations to return.
+            max_distance_m: Optional cut-off distance in meters.
+
+        Returns:
+            List of (Station, distance in meters) sorted by distance.
+        """
+        grid = self._get_spatial_index()
+        return [(self.stations[stop_id], distance) for stop_id, distance in grid.nearest(lat, lon, k, max_distance_m)]
+
+    def station_catalog(self) -> StationCatalog:
+        """
+        Get the parent-station catalog for display.
+
+        Names shared by several parent stations get their stop ID appended, e.g.
+        "86 St (626)". Built once per load and shared by all callers, so treat it as
+        read-only.
+
+        Returns:
+            StationCatalog with display names, sorted order and reverse lookup.
+        """
+        if self._catalog is not None:
+            return self._catalog
+
+        parents = [
+            (stop_id, station.name)
+            for stop_id, station in self.stations.items()
+            if self.stop_to_parent.get(stop_id, stop_id) == stop_id
+        ]
+        name_counts: Dict[str, int] = {}
+        for _, name in parents:
+            name_counts[name] = name_counts.get(name, 0) + 1
+
+        display_names = {
+            stop_id: f"{name} ({stop_id})" if name_counts[name] > 1 else name
+            for stop_id, name in parents
+        }
+        catalog = StationCatalog(
+            display_names=display_names,
+            sorted_items=sorted(display_names.items(), key=lambda item: item[1].lower()),
+            stop_ids_by_display={display: stop_id for stop_id, display in display_names.items()},
+        )
+        self._catalog = catalog
+        return catalog
+
+    def _get_spatial_index(self) -> StationGrid:
+        """Get the nearest-station grid, building it on first use."""
+        if self._spatial_index is not None:
+            return self._spatial_index
+
+        grid = StationGrid(
+            (stop_id, station.latitude, station.longitude)
+            for stop_id, station in self.stations.items()
+            if self.stop_to_parent.get(stop_id, stop_id) == stop_id
+            and (station.latitude or station.longitude)  # Skip stops with invalid coordinates
+        )
+        self._spatial_index = grid
+        return grid
+
+    def _invalidate_indexes(self) -> None:
+        """Drop derived lookup indexes so they are rebuilt from the current data."""
+        self._spatial_index = None
+        self._search_index = None
+        self._catalog = None
+
     def get_stations_for_route(self, route_id: str) -> List[str]:
         """Get all stop IDs served by a route."""
         return list(self.stops_by_route.get(route_id, set()))
@@ -266,4 +714,6 @@ class GTFSLoader:
         self.stops_by_route.clear()
         self.parent_to_children.clear()
         self.stop_to_parent.clear()
+        self.source_hash = None
+        self._invalidate_indexes()
         logger.info("Cleared GTFS data from memory")
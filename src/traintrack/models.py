@@ -1,18 +1,21 @@
 """Data models for MTA Station Tracker."""
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 from datetime import datetime
 
 
 @dataclass
 class Station:
     """Represents an MTA subway station."""
+    # Slotted to keep one instance per stop (parents and every platform) small
+    __slots__ = ("stop_id", "name", "latitude", "longitude", "lines")
+
     stop_id: str
     name: str
     latitude: float
     longitude: float
-    lines: List[str]  # Route IDs served at this station
+    lines: Sequence[str]  # Route IDs served at this station (a shared tuple when loaded from GTFS)
 
 
 @dataclass
@@ -41,3 +44,23 @@ class StationData:
     trains_by_direction: dict  # {direction: [(route_id, trains), ...]}
     alerts: List[Alert]
     last_updated: datetime
+    data_age: Optional[float] = None  # Seconds since the oldest feed behind the arrivals was downloaded
+
+
+@dataclass
+class StationCatalog:
+    """Parent stations with display names, for station pickers and listings."""
+    display_names: Dict[str, str]  # parent stop_id -> name, with " (stop_id)" added when the name repeats
+    sorted_items: List[Tuple[str, str]]  # (stop_id, display name) sorted case-insensitively by display name
+    stop_ids_by_display: Dict[str, str]  # display name -> parent stop_id
+
+
+@dataclass
+class FeedHealth:
+    """Circuit breaker state for one realtime feed."""
+    feed_url: str
+    state: str = "closed"  # "closed" (fetching), "open" (skipped until retry_at) or "half_open" (probing)
+    consecutive_failures: int = 0
+    last_error: Optional[str] = None
+    last_success: Optional[float] = None  # Unix timestamp of the last successful fetch
+    retry_at: Optional[float] = None  # Unix timestamp when an open circuit allows a probe
@@ -1,14 +1,22 @@
 """MTA GTFS-Realtime data fetcher and parser."""
 
+import gzip
+import hashlib
 import logging
 import ssl
+import threading
 import time
 import math
-from typing import Dict, List, Tuple
-from urllib.request import urlopen
+import random
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from dataclasses import replace
 from datetime import datetime
 
-from .models import Train, Alert
+from .models import Train, Alert, FeedHealth
+from .transport import PooledHTTPTransport, TransportResponse
 
 logger = logging.getLogger(__name__)
 
@@ -23,22 +31,102 @@ MTA_FEEDS = {
     "7": "https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs",  # 1-7, S, SIR
 }
 
+# Route IDs carried by each realtime feed (keys match MTA_FEEDS)
+FEED_ROUTES = {
+    "1": ["A", "C", "E", "H", "FS"],
+    "2": ["B", "D", "F", "FX", "M"],
+    "3": ["G"],
+    "4": ["J", "Z"],
+    "5": ["N", "Q", "R", "W"],
+    "6": ["L"],
+    "7": ["1", "2", "3", "4", "5", "5X", "6", "6X", "7", "7X", "GS", "S", "SI", "SIR"],
+}
+
+# route_id -> feed URL
+ROUTE_FEEDS = {
+    route_id: MTA_FEEDS[feed_key]
+    for feed_key, route_ids in FEED_ROUTES.items()
+    for route_id in route_ids
+}
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of fetching a feed that is in its failure backoff window."""
+
 
 class MTAClient:
     """Fetches and parses MTA GTFS-Realtime data."""
 
-    def __init__(self):
-        """Initialize the MTA client."""
+    def __init__(
+        self,
+        max_workers: int = 7,
+        fetch_deadline: float = 12.0,
+        stale_while_revalidate: bool = False,
+        max_staleness: float = 300.0,
+        transport: Optional[PooledHTTPTransport] = None,
+        failure_threshold: int = 2,
+        backoff_base: float = 5.0,
+        backoff_max: float = 300.0,
+        cache_ttl: float = 30.0,
+    ):
+        """
+        Initialize the MTA client.
+
+        Args:
+            max_workers: Maximum number of feeds fetched concurrently.
+            fetch_deadline: Seconds to wait for all concurrent feed fetches before
+                returning partial results.
+            stale_while_revalidate: If True, a feed past its TTL is served from the cache
+                immediately while a background refresh fetches a new copy, so a slow or
+                failed download does not block or blank the caller.
+            max_staleness: Seconds after which a cached feed is discarded rather than
+                served stale (only used with stale_while_revalidate).
+            transport: Downloads feeds, e.g. PooledHTTPTransport() to keep connections
+                alive between refreshes. Anything with the same get() method works.
+                Defaults to urlopen with a new connection per request.
+            failure_threshold: Consecutive failures after which a feed's circuit opens and
+                it is skipped instead of fetched.
+            backoff_base: Seconds a feed is skipped after its circuit first opens; doubles
+                with each further failure (with jitter).
+            backoff_max: Upper bound on the skip window in seconds.
+            cache_ttl: Seconds a downloaded feed is served from the cache before it is
+                fetched (revalidated) again.
+        """
         self._cache: Dict[str, Tuple[list, float]] = {}  # feed_url -> (data, timestamp)
-        self._cache_ttl = 30  # Cache for 30 seconds
+        self._cache_ttl = cache_ttl
         self._max_cache_size = 10  # Limit cache entries
         self._ssl_context = ssl._create_unverified_context()  # Reuse SSL context
+        self._transport = transport
+        # feed_url -> (last payload, ETag, Last-Modified), kept past the TTL for revalidation
+        self._validated: Dict[str, Tuple[bytes, Optional[str], Optional[str]]] = {}
+        self._stale_while_revalidate = stale_while_revalidate
+        self._max_staleness = max_staleness
+        self._revalidating: set = set()  # feed URLs with a background refresh queued or running
+        self._refreshes: set = set()  # Futures of those refreshes, for wait_for_refreshes()
+        self._failure_threshold = failure_threshold
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._health: Dict[str, FeedHealth] = {}  # feed_url -> circuit breaker state
+        self._health_lock = threading.Lock()
+        self._max_workers = max_workers
+        self._fetch_deadline = fetch_deadline
+        self._executor: Optional[ThreadPoolExecutor] = None  # Created on first concurrent fetch
+        self._executor_lock = threading.Lock()
+        self._cache_lock = threading.Lock()  # Guards _cache against concurrent fetch workers
+        # (index kind, feed_url) -> (content digest, parsed index)
+        self._index_cache: Dict[Tuple[str, str], Tuple[str, object]] = {}
+        self._index_lock = threading.Lock()
+        # Work in progress (feed downloads, index builds) -> Future shared with waiters
+        self._inflight: Dict[tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
 
     def get_arrivals_for_stop(
         self,
         stop_id: str,
         feed_urls: List[str] = None,
         related_stop_ids: List[str] = None,
+        parallel: bool = True,
+        deadline: Optional[float] = None,
     ) -> List[Train]:
         """
         Get real-time arrivals for a given stop.
@@ -48,27 +136,115 @@ class MTAClient:
             feed_urls: Optional list of specific feed URLs to query. If None, queries all.
             related_stop_ids: Optional list of related stop IDs (parent + platforms). If provided,
                 arrivals for any of these IDs will be returned.
+            parallel: If True, fetch feeds concurrently; otherwise one after another.
+            deadline: Seconds to wait for concurrent fetches (defaults to fetch_deadline).
+                Feeds that have not arrived by then are skipped for this call.
 
         Returns:
             List of Train objects sorted by arrival time.
         """
+        stop_ids = related_stop_ids if related_stop_ids else [stop_id]
+        return self.get_arrivals_for_stops(
+            {stop_id: stop_ids}, feed_urls=feed_urls, parallel=parallel, deadline=deadline
+        )[stop_id]
+
+    def get_arrivals_for_stops(
+        self,
+        stop_groups: Dict[str, Iterable[str]],
+        feed_urls: List[str] = None,
+        parallel: bool = True,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, List[Train]]:
+        """
+        Get real-time arrivals for many stops in one pass.
+
+        Each feed is fetched and indexed once, and each stop ID in the union of all
+        groups is looked up once, however many groups share it.
+
+        Args:
+            stop_groups: Mapping of caller key (e.g., station stop_id) -> stop IDs whose
+                arrivals belong to that key (parent + platforms).
+            feed_urls: Optional list of specific feed URLs to query. If None, queries all.
+            parallel: If True, fetch feeds concurrently; otherwise one after another.
+            deadline: Seconds to wait for concurrent fetches (defaults to fetch_deadline).
+
+        Returns:
+            Dictionary of key -> Train objects sorted by arrival time.
+        """
         if feed_urls is None:
             feed_urls = list(MTA_FEEDS.values())
 
-        stop_ids = set(related_stop_ids) if related_stop_ids else {stop_id}
-        arrivals: List[Train] = []
-
-        for feed_url in feed_urls:
+        if parallel:
+            feeds = self._fetch_feeds(feed_urls, deadline)
+        else:
+            feeds = {}
+            for feed_url in feed_urls:
+                try:
+                    feeds[feed_url] = self._fetch_feed(feed_url)
+                except Exception as e:
+                    logger.warning(f"Failed to fetch feed {feed_url}: {e}")
+
+        indexes = []
+        for feed_url, feed_data in feeds.items():
             try:
-                feed_data = self._fetch_feed(feed_url)
-                arrivals.extend(self._parse_arrivals(feed_data, stop_ids))
+                indexes.append(self._get_arrivals_index(feed_url, feed_data))
             except Exception as e:
-                logger.warning(f"Failed to fetch feed {feed_url}: {e}")
+                logger.warning(f"Failed to parse feed {feed_url}: {e}")
+
+        return self._arrivals_from_indexes(stop_groups, indexes)
+
+    def _arrivals_from_indexes(
+        self, stop_groups: Dict[str, Iterable[str]], indexes: Iterable[Dict[str, List[tuple]]]
+    ) -> Dict[str, List[Train]]:
+        """Collect each group's trains from parsed arrivals indexes, sorted by arrival time."""
+        # stop_id -> keys of the groups that include it
+        keys_by_stop: Dict[str, List[str]] = {}
+        for key, stop_ids in stop_groups.items():
+            for stop_id in set(stop_ids):
+                if stop_id not in keys_by_stop:
+                    keys_by_stop[stop_id] = []
+                keys_by_stop[stop_id].append(key)
+
+        arrivals: Dict[str, List[Train]] = {key: [] for key in stop_groups}
+
+        for index in indexes:
+            for stop_id, keys in keys_by_stop.items():
+                if stop_id not in index:
+                    continue
+                trains = self._trains_from_index(index, (stop_id,))
+                for key in keys:
+                    arrivals[key].extend(trains)
 
         # Sort by arrival time
-        arrivals.sort(key=lambda x: x.arrival_time)
+        for trains in arrivals.values():
+            trains.sort(key=lambda x: x.arrival_time)
         return arrivals
 
+    @staticmethod
+    def feed_urls_for_routes(route_ids: List[str]) -> Optional[List[str]]:
+        """
+        Get the realtime feeds that carry the given routes.
+
+        Args:
+            route_ids: List of route IDs (e.g., ["L"] or ["1", "2", "3"])
+
+        Returns:
+            Feed URLs in MTA_FEEDS order, or None (meaning all feeds) if no routes are
+            given or any route is not in the routing table.
+        """
+        if not route_ids:
+            return None
+
+        needed = set()
+        for route_id in route_ids:
+            feed_url = ROUTE_FEEDS.get(route_id)
+            if feed_url is None:
+                logger.debug(f"No feed mapping for route {route_id}, querying all feeds")
+                return None
+            needed.add(feed_url)
+
+        return [url for url in MTA_FEEDS.values() if url in needed]
+
     def get_alerts_for_routes(self, route_ids: List[str]) -> List[Alert]:
         """
         Get service alerts for specific routes.
@@ -83,13 +259,66 @@ class MTAClient:
 
         # Alerts are in the main feed (feed 7)
         try:
-            feed_data = self._fetch_feed(MTA_FEEDS["7"])
-            alerts = self._parse_alerts(feed_data, route_ids)
+            feed_url = MTA_FEEDS["7"]
+            index = self._get_alerts_index(feed_url, self._fetch_feed(feed_url))
+            alerts = self._alerts_from_index(index, route_ids)
         except Exception as e:
             logger.warning(f"Failed to fetch alerts: {e}")
 
         return alerts
 
+    def _fetch_feeds(self, feed_urls: List[str], deadline: Optional[float] = None) -> Dict[str, bytes]:
+        """
+        Fetch several feeds concurrently, returning whatever arrives before the deadline.
+
+        Args:
+            feed_urls: Feed URLs to fetch.
+            deadline: Seconds to wait for all fetches (defaults to fetch_deadline).
+
+        Returns:
+            Dictionary of feed_url -> raw protobuf bytes, in the order of feed_urls.
+            Feeds that failed or missed the deadline are omitted.
+        """
+        if len(feed_urls) <= 1:
+            feeds = {}
+            for feed_url in feed_urls:
+                try:
+                    feeds[feed_url] = self._fetch_feed(feed_url)
+                except Exception as e:
+                    logger.warning(f"Failed to fetch feed {feed_url}: {e}")
+            return feeds
+
+        executor = self._get_executor()
+        futures = {url: executor.submit(self._fetch_feed, url) for url in feed_urls}
+        timeout = self._fetch_deadline if deadline is None else deadline
+        wait(futures.values(), timeout=timeout)
+
+        feeds: Dict[str, bytes] = {}
+        for feed_url, future in futures.items():
+            if not future.done():
+                # Leave the fetch running; it will still populate the cache for the next call
+                logger.warning(f"Feed {feed_url} missed the {timeout}s deadline")
+                continue
+            try:
+                feeds[feed_url] = future.result()
+            except Exception as e:
+                logger.warning(f"Failed to fetch feed {feed_url}: {e}")
+        return feeds
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Worker pool for feed fetches; callers may submit related work to it."""
+        return self._get_executor()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the worker pool used for concurrent and background fetches."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="mta-feed"
+                )
+            return self._executor
+
     def _fetch_feed(self, feed_url: str) -> bytes:
         """
         Fetch and cache a GTFS-Realtime feed.
@@ -100,38 +329,323 @@ class MTAClient:
         Returns:
             Raw protobuf bytes.
         """
-        # Check cache
-        now = time.time()
-        if feed_url in self._cache:
-            data, timestamp = self._cache[feed_url]
-            if now - timestamp < self._cache_ttl:
-                logger.debug(f"Using cached data for {feed_url}")
-                return data
-
-        # Evict expired entries to prevent unbounded growth
-        self._evict_expired_cache(now)
-        
-        # Enforce max cache size
-        if len(self._cache) >= self._max_cache_size:
-            # Remove oldest entry
-            oldest_key = min(self._cache.keys(), key=lambda k: self._cache[k][1])
-            del self._cache[oldest_key]
+        if self._stale_while_revalidate:
+            stale = self._get_stale(feed_url)
+            if stale is not None:
+                self._revalidate(feed_url)
+                return stale
+
+        return self._single_flight(
+            ("feed", feed_url), lambda: self._get_cached(feed_url), lambda: self._download_feed(feed_url)
+        )
+
+    def _download_feed(self, feed_url: str) -> bytes:
+        """Download a feed and store it in the cache."""
+        self._check_circuit(feed_url)
+        now, headers, previous = self._prepare_download(feed_url)
 
         logger.debug(f"Fetching {feed_url}")
         try:
-            with urlopen(feed_url, timeout=10, context=self._ssl_context) as response:
-                data = response.read()
-                self._cache[feed_url] = (data, now)
-                return data
+            data = self._finish_download(feed_url, self._http_get(feed_url, headers), previous, now)
         except Exception as e:
             logger.error(f"Failed to fetch {feed_url}: {e}")
+            self._record_failure(feed_url, e)
             raise
-    
+
+        self._record_success(feed_url)
+        return data
+
+    def _prepare_download(self, feed_url: str) -> Tuple[float, Dict[str, str], Optional[tuple]]:
+        """
+        Make room in the cache and build the request headers for a feed download.
+
+        Returns:
+            Tuple of (download start time, request headers, previous (payload, ETag,
+            Last-Modified) or None).
+        """
+        now = time.time()
+        with self._cache_lock:
+            # Evict expired entries to prevent unbounded growth
+            self._evict_expired_cache(now)
+
+            # Enforce max cache size
+            if len(self._cache) >= self._max_cache_size:
+                # Remove oldest entry
+                oldest_key = min(self._cache.keys(), key=lambda k: self._cache[k][1])
+                del self._cache[oldest_key]
+
+            previous = self._validated.get(feed_url)
+
+        # Ask for a compressed body, and for nothing at all if the feed hasn't changed
+        headers = {"Accept-Encoding": "gzip"}
+        if previous is not None:
+            _, etag, last_modified = previous
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        return now, headers, previous
+
+    def _finish_download(
+        self, feed_url: str, response: TransportResponse, previous: Optional[tuple], now: float
+    ) -> bytes:
+        """
+        Turn a feed response into payload bytes and cache them.
+
+        Raises:
+            HTTPError: For any status other than 200 or 304.
+        """
+        if response.status == 304:
+            if previous is None:
+                raise OSError(f"Unexpected 304 Not Modified from {feed_url}")
+            # Same bytes as before, so the parsed indexes are reused as well
+            logger.debug(f"{feed_url} not modified")
+            data = previous[0]
+        elif response.status != 200:
+            # e.g. a redirect from a transport that does not follow them; never cache it as a feed
+            raise HTTPError(feed_url, response.status, f"Unexpected HTTP {response.status}", response.headers, None)
+        else:
+            data = response.body
+            if response.headers.get("content-encoding") == "gzip":
+                data = gzip.decompress(data)
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+            with self._cache_lock:
+                if etag or last_modified:
+                    self._validated[feed_url] = (data, etag, last_modified)
+                else:
+                    self._validated.pop(feed_url, None)
+
+        with self._cache_lock:
+            self._cache[feed_url] = (data, now)
+        return data
+
+    def _http_get(self, feed_url: str, headers: Dict[str, str]) -> TransportResponse:
+        """GET a feed through the configured transport, or urlopen by default."""
+        if self._transport is not None:
+            return self._transport.get(feed_url, headers=headers, timeout=10)
+
+        try:
+            with urlopen(Request(feed_url, headers=headers), timeout=10, context=self._ssl_context) as response:
+                response_headers = {name.lower(): value for name, value in response.headers.items()}
+                return TransportResponse(200, response_headers, response.read())
+        except HTTPError as e:
+            if e.code != 304:
+                raise
+            return TransportResponse(304, {}, b"")
+
+    def _check_circuit(self, feed_url: str) -> None:
+        """
+        Raise CircuitOpenError if the feed is in its backoff window.
+
+        Once the window has passed the circuit goes half-open and this call is let
+        through as a probe; single-flight keeps it to one probe at a time.
+        """
+        with self._health_lock:
+            health = self._health.get(feed_url)
+            if health is None or health.state == "closed":
+                return
+            if health.state == "open":
+                if time.time() < health.retry_at:
+                    raise CircuitOpenError(
+                        f"Skipping {feed_url} for {health.retry_at - time.time():.0f}s after "
+                        f"{health.consecutive_failures} failures: {health.last_error}"
+                    )
+                health.state = "half_open"
+        logger.info(f"Probing {feed_url} after backoff")
+
+    def _record_success(self, feed_url: str) -> None:
+        """Close the feed's circuit after a successful fetch."""
+        with self._health_lock:
+            health = self._health.setdefault(feed_url, FeedHealth(feed_url))
+            if health.state != "closed":
+                logger.info(f"{feed_url} recovered after {health.consecutive_failures} failures")
+            health.state = "closed"
+            health.consecutive_failures = 0
+            health.retry_at = None
+            health.last_success = time.time()
+
+    def _record_failure(self, feed_url: str, error: Exception) -> None:
+        """Count a failed fetch and open the circuit once failures reach the threshold."""
+        with self._health_lock:
+            health = self._health.setdefault(feed_url, FeedHealth(feed_url))
+            health.consecutive_failures += 1
+            health.last_error = str(error) or type(error).__name__
+            if health.consecutive_failures < self._failure_threshold:
+                return
+
+            # Exponential backoff with jitter, so feeds that failed together retry apart
+            exponent = health.consecutive_failures - self._failure_threshold
+            delay = min(self._backoff_max, self._backoff_base * 2 ** min(exponent, 32))
+            delay = delay / 2 + random.uniform(0, delay / 2)
+            health.state = "open"
+            health.retry_at = time.time() + delay
+        logger.warning(f"Circuit open for {feed_url}; retrying in {delay:.1f}s")
+
+    def feed_health(self) -> Dict[str, FeedHealth]:
+        """
+        Get the circuit breaker state of each feed.
+
+        Returns:
+            Dictionary of feed_url -> FeedHealth for every subway feed and any other
+            feed fetched. Feeds never fetched report a closed circuit.
+        """
+        with self._health_lock:
+            urls = list(MTA_FEEDS.values()) + [url for url in self._health if url not in MTA_FEEDS.values()]
+            return {url: replace(self._health.get(url) or FeedHealth(url)) for url in urls}
+
+    def _get_cached(self, feed_url: str) -> Optional[bytes]:
+        """Return cached feed bytes if still within the TTL, else None."""
+        with self._cache_lock:
+            if feed_url in self._cache:
+                data, timestamp = self._cache[feed_url]
+                if time.time() - timestamp < self._cache_ttl:
+                    logger.debug(f"Using cached data for {feed_url}")
+                    return data
+        return None
+
+    def _get_stale(self, feed_url: str) -> Optional[bytes]:
+        """Return cached feed bytes that are past the TTL but within max_staleness, else None."""
+        with self._cache_lock:
+            if feed_url in self._cache:
+                data, timestamp = self._cache[feed_url]
+                age = time.time() - timestamp
+                if self._cache_ttl <= age < self._max_staleness:
+                    logger.debug(f"Serving {feed_url} {age:.0f}s stale while revalidating")
+                    return data
+        return None
+
+    def _revalidate(self, feed_url: str) -> None:
+        """Refresh a feed in the background unless a refresh is already queued."""
+        with self._inflight_lock:
+            if feed_url in self._revalidating:
+                return
+            self._revalidating.add(feed_url)
+
+        def refresh():
+            try:
+                self._single_flight(
+                    ("feed", feed_url), lambda: self._get_cached(feed_url), lambda: self._download_feed(feed_url)
+                )
+            except Exception as e:
+                # The stale copy keeps being served until it passes max_staleness
+                logger.warning(f"Background refresh of {feed_url} failed: {e}")
+            finally:
+                with self._inflight_lock:
+                    self._revalidating.discard(feed_url)
+
+        try:
+            future = self._get_executor().submit(refresh)
+        except RuntimeError:
+            # Executor shut down by close()
+            with self._inflight_lock:
+                self._revalidating.discard(feed_url)
+            return
+
+        with self._inflight_lock:
+            self._refreshes.add(future)
+        future.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, future: Future) -> None:
+        """Forget a finished background refresh."""
+        with self._inflight_lock:
+            self._refreshes.discard(future)
+
+    def wait_for_refreshes(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the background refreshes queued so far to finish.
+
+        Args:
+            timeout: Seconds to wait at most. None waits until they are done.
+
+        Returns:
+            True if every refresh finished, False if the timeout expired first.
+        """
+        with self._inflight_lock:
+            pending = list(self._refreshes)
+        _, not_done = wait(pending, timeout=timeout)
+        return not not_done
+
+    def feed_age(self, feed_url: str) -> Optional[float]:
+        """
+        Get the age of the cached copy of a feed.
+
+        Args:
+            feed_url: Full URL to the feed.
+
+        Returns:
+            Seconds since the cached copy was downloaded, or None if nothing is cached.
+        """
+        with self._cache_lock:
+            if feed_url not in self._cache:
+                return None
+            return time.time() - self._cache[feed_url][1]
+
+    def data_age(self, feed_urls: Optional[Iterable[str]] = None) -> Optional[float]:
+        """
+        Get the age of the oldest cached feed among feed_urls.
+
+        Args:
+            feed_urls: Feeds to check. Defaults to all feeds.
+
+        Returns:
+            Seconds since the oldest of them was downloaded, or None if none are cached.
+        """
+        if feed_urls is None:
+            feed_urls = MTA_FEEDS.values()
+        ages = [age for age in (self.feed_age(url) for url in feed_urls) if age is not None]
+        return max(ages) if ages else None
+
+    def _single_flight(self, key: tuple, lookup: Callable[[], Any], produce: Callable[[], Any]) -> Any:
+        """
+        Run produce() at most once at a time per key, sharing its outcome with concurrent callers.
+
+        The first caller to miss lookup() becomes the leader and runs produce(); callers
+        arriving while it runs wait on the leader's Future and get the same value or
+        exception instead of repeating the work. produce() must store its value where
+        lookup() will find it, so callers arriving afterwards hit the cache.
+
+        Args:
+            key: Identifies the work being coalesced.
+            lookup: Returns the cached value, or None on a miss.
+            produce: Computes (and caches) the value.
+
+        Returns:
+            The cached or produced value.
+        """
+        with self._inflight_lock:
+            value = lookup()
+            if value is not None:
+                return value
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            logger.debug(f"Waiting for in-flight {key[0]} {key[1:]}")
+            return future.result()
+
+        try:
+            value = produce()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+
     def _evict_expired_cache(self, current_time: float) -> None:
-        """Remove expired cache entries."""
+        """Remove expired cache entries. Caller must hold _cache_lock."""
+        # Stale entries stay servable until max_staleness in stale-while-revalidate mode
+        max_age = self._max_staleness if self._stale_while_revalidate else self._cache_ttl
         expired_keys = [
             url for url, (_, timestamp) in self._cache.items()
-            if current_time - timestamp >= self._cache_ttl
+            if current_time - timestamp >= max_age
         ]
         for key in expired_keys:
             del self._cache[key]
@@ -141,18 +655,71 @@ class MTAClient:
     
     def clear_cache(self) -> None:
         """Manually clear the cache."""
-        self._cache.clear()
+        with self._cache_lock:
+            self._cache.clear()
+            self._validated.clear()
+        with self._index_lock:
+            self._index_cache.clear()
+
+    def close(self) -> None:
+        """Shut down the background fetch workers and close pooled connections."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        if self._transport is not None:
+            self._transport.close()
+
+    def _get_arrivals_index(self, feed_url: str, feed_data: bytes) -> Dict[str, List[tuple]]:
+        """
+        Get the stop_id-keyed arrivals index for a feed, parsing it only when the bytes change.
+
+        Args:
+            feed_url: Feed URL the bytes came from.
+            feed_data: Raw protobuf bytes.
+
+        Returns:
+            Dictionary of stop_id -> [(route_id, direction_id, arrival_time, trip_id), ...].
+        """
+        return self._get_feed_index("arrivals", feed_url, feed_data, self._build_arrivals_index)
 
-    def _parse_arrivals(self, feed_data: bytes, stop_ids: set) -> List[Train]:
+    def _get_feed_index(self, kind: str, feed_url: str, feed_data: bytes, build):
         """
-        Parse arrivals from GTFS-Realtime feed.
+        Return a cached index of feed_data, calling build(feed_data) only for new bytes.
+
+        Args:
+            kind: Index type ("arrivals" or "alerts"); each is cached separately.
+            feed_url: Feed URL the bytes came from.
+            feed_data: Raw protobuf bytes.
+            build: Function turning the bytes into the index.
+        """
+        key = (kind, feed_url)
+        digest = hashlib.sha1(feed_data).hexdigest()
+
+        def lookup():
+            with self._index_lock:
+                cached = self._index_cache.get(key)
+            if cached is not None and cached[0] == digest:
+                return cached[1]
+            return None
+
+        def produce():
+            index = build(feed_data)
+            with self._index_lock:
+                self._index_cache[key] = (digest, index)
+            return index
+
+        return self._single_flight(("index", kind, feed_url, digest), lookup, produce)
+
+    def _build_arrivals_index(self, feed_data: bytes) -> Dict[str, List[tuple]]:
+        """
+        Parse a GTFS-Realtime feed into an arrivals index keyed by stop_id.
 
         Args:
             feed_data: Raw protobuf bytes.
-            stop_ids: Stop IDs to filter by.
 
         Returns:
-            List of Train objects.
+            Dictionary of stop_id -> [(route_id, direction_id, arrival_time, trip_id), ...].
         """
         try:
             from google.transit import gtfs_realtime_pb2
@@ -160,7 +727,7 @@ class MTAClient:
             feed = gtfs_realtime_pb2.FeedMessage()
             feed.ParseFromString(feed_data)
 
-            arrivals: List[Train] = []
+            index: Dict[str, List[tuple]] = {}
 
             for entity in feed.entity:
                 if not entity.HasField("trip_update"):
@@ -168,153 +735,194 @@ class MTAClient:
 
                 trip_update = entity.trip_update
                 route_id = trip_update.trip.route_id
+                trip_id = trip_update.trip.trip_id
                 has_dir = trip_update.trip.HasField("direction_id")
                 direction_id = trip_update.trip.direction_id if has_dir else None
 
                 for stop_time_update in trip_update.stop_time_update:
-                    if stop_time_update.stop_id in stop_ids:
-                        # Get arrival time
-                        if stop_time_update.HasField("arrival"):
-                            arrival_time = stop_time_update.arrival.time
-                        else:
-                            arrival_time = stop_time_update.departure.time
-
-                        # Calculate minutes away
-                        current_time = time.time()
-                        seconds_away = arrival_time - current_time
-
-
-
-                        # Skip predictions that are clearly stale (>60 seconds in the past)
-                        if seconds_away < -60:
-                            continue
-
-                        # Simple ceiling calculation: round up to nearest minute
-                        # This gives realistic times without artificial 0-minute spam
-                        if seconds_away <= 0:
-                            minutes_away = 0
-                        else:
-                            minutes_away = math.ceil(seconds_away / 60)
-
-                        # Fallback direction: derive from stop_id suffix when missing
-                        if direction_id is None:
-                            suffix = stop_time_update.stop_id[-1:].upper()
-                            direction_id_val = 1 if suffix == "N" else 0
-                        else:
-                            direction_id_val = direction_id
-
-                        # Get destination (use route as fallback; trip_headsign not present in descriptor)
-                        destination = f"{route_id} Train"
-
-                        train = Train(
-                            route_id=route_id,
-                            direction_id=direction_id_val,
-                            arrival_time=arrival_time,
-                            minutes_away=minutes_away,
-                            destination=destination,
-                            trip_id=trip_update.trip.trip_id,
-                        )
-                        arrivals.append(train)
-
-            return arrivals
+                    stop_id = stop_time_update.stop_id
+
+                    # Get arrival time
+                    if stop_time_update.HasField("arrival"):
+                        arrival_time = stop_time_update.arrival.time
+                    else:
+                        arrival_time = stop_time_update.departure.time
+
+                    # Fallback direction: derive from stop_id suffix when missing
+                    if direction_id is None:
+                        suffix = stop_id[-1:].upper()
+                        direction_id_val = 1 if suffix == "N" else 0
+                    else:
+                        direction_id_val = direction_id
+
+                    if stop_id not in index:
+                        index[stop_id] = []
+                    index[stop_id].append((route_id, direction_id_val, arrival_time, trip_id))
+
+            return index
 
         except ImportError:
             logger.error("google.transit.gtfs_realtime_pb2 not installed")
             raise
         except Exception as e:
             logger.error(f"Failed to parse arrivals: {e}")
-            return []
+            return {}
 
-    def _parse_alerts(self, feed_data: bytes, route_ids: List[str]) -> List[Alert]:
+    @staticmethod
+    def _trains_from_index(index: Dict[str, List[tuple]], stop_ids: Iterable[str]) -> List[Train]:
         """
-        Parse service alerts from GTFS-Realtime feed.
+        Look up arrivals for a set of stops in a parsed feed index.
 
         Args:
+            index: Arrivals index from _build_arrivals_index().
+            stop_ids: Stop IDs to filter by.
+
+        Returns:
+            List of Train objects.
+        """
+        arrivals: List[Train] = []
+        current_time = time.time()
+
+        for stop_id in stop_ids:
+            for route_id, direction_id, arrival_time, trip_id in index.get(stop_id, ()):
+                seconds_away = arrival_time - current_time
+
+                # Skip predictions that are clearly stale (>60 seconds in the past)
+                if seconds_away < -60:
+                    continue
+
+                # Simple ceiling calculation: round up to nearest minute
+                # This gives realistic times without artificial 0-minute spam
+                if seconds_away <= 0:
+                    minutes_away = 0
+                else:
+                    minutes_away = math.ceil(seconds_away / 60)
+
+                # Get destination (use route as fallback; trip_headsign not present in descriptor)
+                destination = f"{route_id} Train"
+
+                arrivals.append(
+                    Train(
+                        route_id=route_id,
+                        direction_id=direction_id,
+                        arrival_time=arrival_time,
+                        minutes_away=minutes_away,
+                        destination=destination,
+                        trip_id=trip_id,
+                    )
+                )
+
+        return arrivals
+
+    def _get_alerts_index(self, feed_url: str, feed_data: bytes) -> Tuple[List[tuple], Dict[str, List[int]]]:
+        """
+        Get the route-keyed alerts index for a feed, parsing it only when the bytes change.
+
+        Args:
+            feed_url: Feed URL the bytes came from.
             feed_data: Raw protobuf bytes.
-            route_ids: Route IDs to filter by.
 
         Returns:
-            List of Alert objects.
+            Tuple of (alerts, by_route): alerts is a list of (message, route_ids) in feed
+            order, by_route maps route_id -> positions in alerts.
         """
+        return self._get_feed_index("alerts", feed_url, feed_data, self._build_alerts_index)
+
+    def _build_alerts_index(self, feed_data: bytes) -> Tuple[List[tuple], Dict[str, List[int]]]:
+        """
+        Parse service alerts from a GTFS-Realtime feed in a single pass.
+
+        Args:
+            feed_data: Raw protobuf bytes.
+
+        Returns:
+            Tuple of (alerts, by_route) as described in _get_alerts_index().
+        """
+        alerts: List[tuple] = []
+        by_route: Dict[str, List[int]] = {}
+
         try:
             from google.transit import gtfs_realtime_pb2
 
             feed = gtfs_realtime_pb2.FeedMessage()
             feed.ParseFromString(feed_data)
 
-            alerts: List[Alert] = []
-            route_ids_set = set(route_ids)
-            
-            logger.debug(f"Parsing alerts for routes: {route_ids_set}")
-            
-            # First pass: collect all unique route_ids in the feed
-            all_feed_routes = set()
-
             for entity in feed.entity:
                 if not entity.HasField("alert"):
                     continue
 
                 alert_obj = entity.alert
-                
-                # Collect all route_ids mentioned in this alert
+
+                # Routes this alert applies to, in informed_entity order
+                route_ids: List[str] = []
                 for informed_entity in alert_obj.informed_entity:
                     # Route can be specified directly in route_id OR in trip.route_id
                     route_id = informed_entity.route_id
                     if not route_id and informed_entity.HasField("trip"):
                         route_id = informed_entity.trip.route_id
-                    
-                    if route_id:
-                        all_feed_routes.add(route_id)
-
-            logger.debug(f"Routes with alerts in feed: {sorted(all_feed_routes)}")
-            
-            # Second pass: extract matching alerts
-            processed_alerts = set()  # Track processed alerts to avoid duplicates
-            
-            for entity in feed.entity:
-                if not entity.HasField("alert"):
+
+                    if route_id and route_id not in route_ids:
+                        route_ids.append(route_id)
+
+                if not route_ids:
                     continue
 
-                alert_obj = entity.alert
-                alert_id = id(alert_obj)  # Use object id to track unique alerts
-                
-                # Check if alert affects any of our routes
-                for informed_entity in alert_obj.informed_entity:
-                    # Route can be specified directly in route_id OR in trip.route_id
-                    route_id = informed_entity.route_id
-                    if not route_id and informed_entity.HasField("trip"):
-                        route_id = informed_entity.trip.route_id
-                    
-                    if route_id and route_id in route_ids_set:
-                        if alert_id not in processed_alerts:
-                            # Get alert message
-                            header_text = ""
-                            description_text = ""
-
-                            if alert_obj.HasField("header_text") and alert_obj.header_text.translation:
-                                header_text = alert_obj.header_text.translation[0].text
-
-                            if alert_obj.HasField("description_text") and alert_obj.description_text.translation:
-                                description_text = alert_obj.description_text.translation[0].text
-
-                            message = f"{header_text} {description_text}".strip()
-                            
-                            logger.debug(f"Found alert for route {route_id}: {message[:50]}")
-
-                            alert = Alert(
-                                route_id=route_id,
-                                message=message,
-                                severity="WARNING",
-                            )
-                            alerts.append(alert)
-                            processed_alerts.add(alert_id)
-
-            logger.debug(f"Parsed {len(alerts)} alerts")
-            return alerts
+                # Get alert message
+                header_text = ""
+                description_text = ""
+
+                if alert_obj.HasField("header_text") and alert_obj.header_text.translation:
+                    header_text = alert_obj.header_text.translation[0].text
+
+                if alert_obj.HasField("description_text") and alert_obj.description_text.translation:
+                    description_text = alert_obj.description_text.translation[0].text
+
+                message = f"{header_text} {description_text}".strip()
+
+                position = len(alerts)
+                alerts.append((message, tuple(route_ids)))
+                for route_id in route_ids:
+                    if route_id not in by_route:
+                        by_route[route_id] = []
+                    by_route[route_id].append(position)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Routes with alerts in feed: {sorted(by_route)}")
 
         except ImportError:
             logger.error("google.transit.gtfs_realtime_pb2 not installed")
-            return []
         except Exception as e:
             logger.error(f"Failed to parse alerts: {e}", exc_info=True)
-            return []
+
+        return alerts, by_route
+
+    @staticmethod
+    def _alerts_from_index(index: Tuple[List[tuple], Dict[str, List[int]]], route_ids: List[str]) -> List[Alert]:
+        """
+        Look up alerts for routes in a parsed alerts index.
+
+        Each alert is returned once, in feed order, tagged with the first of its
+        routes that was asked for.
+
+        Args:
+            index: Alerts index from _build_alerts_index().
+            route_ids: Route IDs to filter by.
+
+        Returns:
+            List of Alert objects.
+        """
+        alerts, by_route = index
+        route_ids_set = set(route_ids)
+
+        positions = set()
+        for route_id in route_ids_set:
+            positions.update(by_route.get(route_id, ()))
+
+        result: List[Alert] = []
+        for position in sorted(positions):
+            message, alert_routes = alerts[position]
+            route_id = next(r for r in alert_routes if r in route_ids_set)
+            result.append(Alert(route_id=route_id, message=message, severity="WARNING"))
+
+        logger.debug(f"Found {len(result)} alerts for routes {sorted(route_ids_set)}")
+        return result
@@ -0,0 +1,219 @@
+"""Prebuilt search index for station names."""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Set, Tuple
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+NGRAM_SIZE = 3
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase a station name and collapse punctuation and spaces to single spaces."""
+    return _NON_ALNUM.sub(" ", name.lower()).strip()
+
+
+def _ngrams(text: str) -> Set[str]:
+    """All NGRAM_SIZE-character substrings of text."""
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def _word_trigrams(tokens: List[str]) -> Set[str]:
+    """Trigrams of each token padded with two leading spaces and one trailing space.
+
+    Padding weights the start of words, so "tims" still shares "  t", " ti" and "tim"
+    with "times" despite the missing letter.
+    """
+    grams: Set[str] = set()
+    for token in tokens:
+        grams |= _ngrams(f"  {token} ")
+    return grams
+
+
+class _TrieNode:
+    """Prefix trie node holding the ids of every name with a token under this prefix."""
+
+    __slots__ = ("children", "name_ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.name_ids: Set[int] = set()
+
+
+class StationSearchIndex:
+    """
+    Indexes station names for substring, ranked, fuzzy search and autocomplete.
+
+    Names are normalized (lowercase, punctuation folded to spaces), split into tokens
+    stored in a prefix trie, and broken into trigrams for substring and typo-tolerant
+    queries, so a lookup touches only the names that can match.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        """
+        Build the index.
+
+        Args:
+            names: Station names. Results keep this order when unranked.
+        """
+        self.names: List[str] = list(names)
+        self.size = len(self.names)
+        self._normalized = [normalize_name(name) for name in self.names]
+        self._tokens = [norm.split() for norm in self._normalized]
+        self._trie = _TrieNode()
+        self._ngram_index: Dict[str, Set[int]] = {}
+        self._fuzzy_index: Dict[str, List[int]] = {}  # padded word trigram -> name ids
+        self._fuzzy_sizes: List[int] = []  # number of distinct padded trigrams per name
+
+        for name_id, norm in enumerate(self._normalized):
+            for token in set(self._tokens[name_id]):
+                node = self._trie
+                for char in token:
+                    child = node.children.get(char)
+                    if child is None:
+                        child = node.children[char] = _TrieNode()
+                    child.name_ids.add(name_id)
+                    node = child
+            for gram in _ngrams(norm):
+                if gram not in self._ngram_index:
+                    self._ngram_index[gram] = set()
+                self._ngram_index[gram].add(name_id)
+            word_grams = _word_trigrams(self._tokens[name_id])
+            self._fuzzy_sizes.append(len(word_grams))
+            for gram in word_grams:
+                if gram not in self._fuzzy_index:
+                    self._fuzzy_index[gram] = []
+                self._fuzzy_index[gram].append(name_id)
+
+    def _prefix_ids(self, token: str) -> Set[int]:
+        """Ids of names with a token starting with `token`."""
+        node = self._trie
+        for char in token:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.name_ids
+
+    def _token_prefix_ids(self, tokens: List[str]) -> Set[int]:
+        """Ids of names where every query token is a prefix of some name token."""
+        if not tokens:
+            return set()
+        postings = sorted((self._prefix_ids(token) for token in tokens), key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+        return result
+
+    def _substring_ids(self, query: str) -> Set[int]:
+        """Ids of names whose normalized form contains the normalized query."""
+        if len(query) < NGRAM_SIZE:
+            return {i for i, norm in enumerate(self._normalized) if query in norm}
+
+        postings = sorted((self._ngram_index.get(gram, set()) for gram in _ngrams(query)), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        # Trigrams can all be present without being contiguous; confirm the match
+        return {i for i in candidates if query in self._normalized[i]}
+
+    def substring(self, query: str) -> List[str]:
+        """
+        Names containing the query (case- and punctuation-insensitive), in index order.
+
+        An empty query matches every name.
+        """
+        norm = normalize_name(query)
+        if not norm:
+            return list(self.names)
+        return [self.names[i] for i in sorted(self._substring_ids(norm))]
+
+    def _score(self, name_id: int, query: str, query_tokens: List[str]) -> float:
+        """Rank a candidate name for a normalized query (higher is better)."""
+        norm = self._normalized[name_id]
+        if norm == query:
+            return 1.0
+        if norm.startswith(query):
+            return 0.9
+        name_tokens = self._tokens[name_id]
+        if all(any(token.startswith(q) for token in name_tokens) for q in query_tokens):
+            # Prefer names with fewer tokens beyond the ones typed
+            return 0.7 + 0.1 * min(1.0, len(query_tokens) / max(1, len(name_tokens)))
+        if query in norm:
+            return 0.5
+        return 0.0
+
+    def _rank(self, name_ids: Set[int], query: str, query_tokens: List[str], limit: int) -> List[Tuple[str, float]]:
+        """Score and sort candidates: best score, then shorter name, then alphabetical."""
+        scored = [(self._score(i, query, query_tokens), i) for i in name_ids]
+        scored.sort(key=lambda item: (-item[0], len(self.names[item[1]]), self.names[item[1]]))
+        return [(self.names[i], score) for score, i in scored[:limit] if score > 0]
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Ranked search over names.
+
+        Matches names containing the query or whose tokens start with every query token.
+
+        Returns:
+            List of (name, score) with the best match first. Scores are in (0, 1].
+        """
+        norm = normalize_name(query)
+        if not norm:
+            return []
+        tokens = norm.split()
+        candidates = self._token_prefix_ids(tokens) | self._substring_ids(norm)
+        return self._rank(candidates, norm, tokens, limit)
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[str]:
+        """
+        Complete a partially typed name.
+
+        Every typed token must be the start of a token in the name, e.g. "tim sq"
+        completes to "Times Sq-42 St".
+        """
+        norm = normalize_name(prefix)
+        if not norm:
+            return []
+        tokens = norm.split()
+        return [name for name, _ in self._rank(self._token_prefix_ids(tokens), norm, tokens, limit)]
+
+    def fuzzy(self, query: str, limit: int = 5, min_score: float = 0.3) -> List[Tuple[str, float]]:
+        """
+        Typo-tolerant ranked search.
+
+        Candidates are the names sharing at least one padded word trigram with the query,
+        found through the trigram postings rather than by comparing against every name.
+        Each is scored as the mean of query coverage (shared / query trigrams) and the
+        Dice coefficient, and exact, prefix and substring matches keep their search() score
+        when that is higher.
+
+        Args:
+            query: Possibly misspelled station name (e.g., "Tims Sq").
+            limit: Maximum number of results.
+            min_score: Drop candidates scoring below this.
+
+        Returns:
+            List of (name, score) with the best match first. Scores are in (0, 1].
+        """
+        norm = normalize_name(query)
+        if not norm:
+            return []
+        tokens = norm.split()
+        query_grams = _word_trigrams(tokens)
+
+        shared: Counter = Counter()
+        for gram in query_grams:
+            shared.update(self._fuzzy_index.get(gram, ()))
+
+        scored = []
+        for name_id, count in shared.items():
+            coverage = count / len(query_grams)
+            dice = 2 * count / (len(query_grams) + self._fuzzy_sizes[name_id])
+            score = max((coverage + dice) / 2, self._score(name_id, norm, tokens))
+            if score >= min_score:
+                scored.append((score, name_id))
+
+        scored.sort(key=lambda item: (-item[0], len(self.names[item[1]]), self.names[item[1]]))
+        return [(self.names[i], score) for score, i in scored[:limit]]
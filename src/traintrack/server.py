@@ -0,0 +1,545 @@
+"""HTTP/JSON server sharing one tracker's data with display clients on the LAN.
+
+Run with ``python -m traintrack.server --port 8080`` (or ``traintrack-server``).
+
+Endpoints:
+    GET /stations                   Parent stations with coordinates and lines
+    GET /stations/{stop_id}/arrivals  Arrivals grouped by direction
+    GET /alerts?routes=1,2,L        Service alerts (all routes if omitted)
+    GET /stream?stations=127,L06    Server-Sent Events: arrival snapshot, then diffs
+
+Response bodies are rendered once and cached, and carry an ETag so unchanged
+responses cost clients a 304.
+
+The stream sends one ``snapshot`` event per station (its full arrivals, as in
+/stations/{stop_id}/arrivals) and then a ``diff`` event whenever that station's
+arrivals change::
+
+    {"stop_id": "127",
+     "added":   [{"direction": "Uptown", "route_id": "1", "destination": "...", "minutes_away": 14}],
+     "removed": [{"direction": ..., "route_id": ..., "destination": ..., "minutes_away": 1}],
+     "changed": [{"direction": ..., "route_id": ..., "destination": ..., "minutes_away": 4, "was": 5}]}
+
+A client applies a diff to its copy by dropping one matching train per
+``removed`` entry, moving one train from ``was`` to ``minutes_away`` per
+``changed`` entry, adding the ``added`` trains, and re-sorting each direction by
+route then minutes. Idle streams only carry a comment line every
+STREAM_KEEPALIVE seconds.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import queue
+import ssl
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .models import Alert, Station
+from .mta_client import MTAClient
+from .station_tracker import MTAStationTracker
+from .transport import PooledHTTPTransport
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED_BODIES = 512  # Rendered bodies kept; the least recently used go first
+STREAM_KEEPALIVE = 30.0  # Seconds between comment lines on an idle stream
+
+
+def station_to_dict(station: Station) -> dict:
+    """JSON-ready form of a Station."""
+    return {
+        "stop_id": station.stop_id,
+        "name": station.name,
+        "latitude": station.latitude,
+        "longitude": station.longitude,
+        "lines": list(station.lines),
+    }
+
+
+def arrivals_to_dict(arrivals: Dict[str, List[tuple]]) -> Dict[str, List[dict]]:
+    """JSON-ready form of get_arrivals() output."""
+    return {
+        direction: [
+            {"route_id": route_id, "minutes_away": minutes, "destination": destination}
+            for route_id, minutes, destination in trains
+        ]
+        for direction, trains in arrivals.items()
+    }
+
+
+def alert_to_dict(alert: Alert) -> dict:
+    """JSON-ready form of an Alert."""
+    return {"route_id": alert.route_id, "message": alert.message, "severity": alert.severity}
+
+
+def diff_arrivals(old: Dict[str, List[tuple]], new: Dict[str, List[tuple]]) -> Dict[str, List[dict]]:
+    """
+    Compute the trains added, removed and re-timed between two get_arrivals() results.
+
+    Trains are matched within each (direction, route, destination) in arrival order.
+    Trains at the front of the old list that arrive before the first new train are
+    taken to have departed, so a departure does not show up as every later train
+    changing.
+
+    Returns:
+        Dictionary with "added", "removed" and "changed" lists (see module docstring).
+    """
+    added: List[dict] = []
+    removed: List[dict] = []
+    changed: List[dict] = []
+
+    for direction in sorted(set(old) | set(new)):
+        before = _minutes_by_train(old.get(direction, ()))
+        after = _minutes_by_train(new.get(direction, ()))
+        for (route_id, destination) in sorted(set(before) | set(after)):
+            old_minutes = before.get((route_id, destination), [])
+            new_minutes = after.get((route_id, destination), [])
+            train = {"direction": direction, "route_id": route_id, "destination": destination}
+
+            departed = 0
+            if new_minutes:
+                while departed < len(old_minutes) and old_minutes[departed] < new_minutes[0]:
+                    departed += 1
+            for minutes in old_minutes[:departed]:
+                removed.append(dict(train, minutes_away=minutes))
+
+            remaining = old_minutes[departed:]
+            for i in range(max(len(remaining), len(new_minutes))):
+                if i >= len(new_minutes):
+                    removed.append(dict(train, minutes_away=remaining[i]))
+                elif i >= len(remaining):
+                    added.append(dict(train, minutes_away=new_minutes[i]))
+                elif remaining[i] != new_minutes[i]:
+                    changed.append(dict(train, minutes_away=new_minutes[i], was=remaining[i]))
+
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def _minutes_by_train(trains: List[tuple]) -> Dict[Tuple[str, str], List[int]]:
+    """Group (route_id, minutes_away, destination) tuples into sorted minutes per (route, destination)."""
+    grouped: Dict[Tuple[str, str], List[int]] = {}
+    for route_id, minutes, destination in trains:
+        key = (route_id, destination)
+        if key not in grouped:
+            grouped[key] = []
+        grouped[key].append(minutes)
+    for minutes in grouped.values():
+        minutes.sort()
+    return grouped
+
+
+def _sse_event(event: str, payload: dict) -> bytes:
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+class _StationStream:
+    """Stream state for one station: subscription, last arrivals and client queues."""
+
+    __slots__ = ("token", "arrivals", "clients")
+
+    def __init__(self):
+        self.token: Optional[int] = None
+        self.arrivals: Optional[Dict[str, List[tuple]]] = None
+        self.clients: set = set()
+
+
+class StreamHub:
+    """
+    Fans arrival changes out to streaming clients.
+
+    Each streamed station has a single tracker subscription, whatever the number of
+    clients, so all streams are fed by the tracker's one background poller. Events
+    are encoded once and the same bytes are queued for every client.
+    """
+
+    def __init__(self, tracker: MTAStationTracker):
+        """
+        Args:
+            tracker: Tracker whose subscriptions drive the streams.
+        """
+        self.tracker = tracker
+        self._stations: Dict[str, _StationStream] = {}  # stop_id -> stream state
+        self._lock = threading.Lock()
+
+    def open(self, stations: List[Station]) -> "queue.Queue":
+        """
+        Register a client for some stations.
+
+        Returns:
+            Queue receiving encoded events (None when the hub closes). A snapshot for
+            each station with known arrivals is already queued.
+        """
+        client: queue.Queue = queue.Queue()
+        with self._lock:
+            for station in stations:
+                stream = self._stations.get(station.stop_id)
+                if stream is None:
+                    stream = self._stations[station.stop_id] = _StationStream()
+                    stream.token = self.tracker.subscribe(station, self._on_change)
+                elif stream.arrivals is not None:
+                    client.put(_sse_event("snapshot", self._snapshot(station.stop_id, stream.arrivals)))
+                stream.clients.add(client)
+        return client
+
+    def close(self, client: "queue.Queue") -> None:
+        """Unregister a client, dropping subscriptions no other client needs."""
+        tokens = []
+        with self._lock:
+            for stop_id, stream in list(self._stations.items()):
+                stream.clients.discard(client)
+                if not stream.clients:
+                    del self._stations[stop_id]
+                    tokens.append(stream.token)
+        # Outside the lock: unsubscribing the last station waits for the poller,
+        # which may be about to call _on_change
+        for token in tokens:
+            self.tracker.unsubscribe(token)
+
+    def shutdown(self) -> None:
+        """End every open stream."""
+        with self._lock:
+            clients = {client for stream in self._stations.values() for client in stream.clients}
+        for client in clients:
+            client.put(None)
+
+    def _on_change(self, station: Station, arrivals: Dict[str, List[tuple]]) -> None:
+        """Subscription callback: queue a snapshot or diff for the station's clients."""
+        with self._lock:
+            stream = self._stations.get(station.stop_id)
+            if stream is None:
+                return
+            if stream.arrivals is None:
+                event = _sse_event("snapshot", self._snapshot(station.stop_id, arrivals))
+            else:
+                diff = diff_arrivals(stream.arrivals, arrivals)
+                if not (diff["added"] or diff["removed"] or diff["changed"]):
+                    stream.arrivals = arrivals
+                    return
+                diff["stop_id"] = station.stop_id
+                event = _sse_event("diff", diff)
+            stream.arrivals = arrivals
+            for client in stream.clients:
+                client.put(event)
+
+    @staticmethod
+    def _snapshot(stop_id: str, arrivals: Dict[str, List[tuple]]) -> dict:
+        """Snapshot event payload."""
+        return {"stop_id": stop_id, "arrivals": arrivals_to_dict(arrivals)}
+
+
+class NotFound(Exception):
+    """Raised by route handlers for unknown paths or stations."""
+
+
+class ArrivalsServer:
+    """
+    Serves a tracker's stations, arrivals and alerts as JSON.
+
+    Bodies are cached per endpoint and the parameters it uses (unrelated query
+    strings share an entry): the station list until the tracker swaps in new GTFS
+    data, arrivals and alerts for cache_ttl seconds. Concurrent requests for the same
+    body wait for one render, and share the tracker (and so its feed cache), so one
+    server does the feed downloads and parsing for any number of clients.
+    """
+
+    def __init__(self, tracker: MTAStationTracker, host: str = "0.0.0.0", port: int = 8080, cache_ttl: float = 5.0):
+        """
+        Create the server (call serve_forever() or start() to begin serving).
+
+        Args:
+            tracker: Tracker with GTFS data loaded.
+            host: Interface to bind.
+            port: Port to bind (0 picks a free one).
+            cache_ttl: Seconds a rendered arrivals or alerts body is reused.
+        """
+        self.tracker = tracker
+        self.cache_ttl = cache_ttl
+        # body key -> (body, etag, expires at, GTFS loader it was rendered from), in LRU order
+        self._bodies: "OrderedDict[tuple, Tuple[bytes, str, float, object]]" = OrderedDict()
+        self._rendering: Dict[tuple, Future] = {}  # body key -> render in progress
+        self._bodies_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.streams = StreamHub(tracker)
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """Base URL the server is listening on."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        """Serve requests on this thread until shutdown()."""
+        self._httpd.serve_forever()
+
+    def start(self) -> None:
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="arrivals-server", daemon=True)
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        """Stop serving, end open streams and close the socket."""
+        self.streams.shutdown()
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._httpd.server_close()
+
+    def get_body(self, target: str) -> Tuple[bytes, str]:
+        """
+        Get the JSON body for a request target, rendering it if the cached one expired.
+
+        Args:
+            target: Request path with query string (e.g., "/alerts?routes=L").
+
+        Returns:
+            Tuple of (body, ETag).
+
+        Raises:
+            NotFound: For unknown paths or stations.
+        """
+        key = self._body_key(target)
+        loader = self.tracker.gtfs_loader
+        with self._bodies_lock:
+            cached = self._bodies.get(key)
+            if cached is not None and cached[2] > time.monotonic() and cached[3] is loader:
+                self._bodies.move_to_end(key)
+                return cached[0], cached[1]
+            render = self._rendering.get(key)
+            leader = render is None
+            if leader:
+                render = self._rendering[key] = Future()
+
+        if not leader:
+            return render.result()
+
+        try:
+            payload, ttl = self._render(key)
+            body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        except BaseException as e:
+            with self._bodies_lock:
+                del self._rendering[key]
+            render.set_exception(e)
+            raise
+
+        with self._bodies_lock:
+            self._bodies[key] = (body, etag, time.monotonic() + ttl, loader)
+            self._bodies.move_to_end(key)
+            while len(self._bodies) > MAX_CACHED_BODIES:
+                self._bodies.popitem(last=False)
+            del self._rendering[key]
+        render.set_result((body, etag))
+        return body, etag
+
+    def _body_key(self, target: str) -> tuple:
+        """
+        Reduce a request target to the endpoint and the parameters it uses.
+
+        Raises:
+            NotFound: For unknown paths.
+        """
+        parts = urlsplit(target)
+        segments = [unquote(segment) for segment in parts.path.strip("/").split("/") if segment]
+
+        if segments == ["stations"]:
+            return ("stations",)
+        if len(segments) == 3 and segments[0] == "stations" and segments[2] == "arrivals":
+            return ("arrivals", segments[1])
+        if segments == ["alerts"]:
+            routes = {
+                route_id
+                for value in parse_qs(parts.query).get("routes", [])
+                for route_id in value.split(",")
+                if route_id
+            }
+            return ("alerts",) + tuple(sorted(routes))
+        raise NotFound(f"No such endpoint: {parts.path}")
+
+    def _render(self, key: tuple) -> Tuple[object, float]:
+        """Build the payload for a body key. Returns (payload, seconds to cache it)."""
+        if key[0] == "stations":
+            return self._render_stations(), float("inf")
+        if key[0] == "arrivals":
+            return self._render_arrivals(key[1]), self.cache_ttl
+        return self._render_alerts(list(key[1:])), self.cache_ttl
+
+    def _render_stations(self) -> List[dict]:
+        """Parent stations in display order."""
+        loader = self.tracker.gtfs_loader
+        catalog = loader.station_catalog()
+        stations = []
+        for stop_id, display_name in catalog.sorted_items:
+            entry = station_to_dict(loader.stations[stop_id])
+            entry["display_name"] = display_name
+            stations.append(entry)
+        return stations
+
+    def _render_arrivals(self, stop_id: str) -> dict:
+        """Arrivals for one station."""
+        try:
+            station = self.tracker.gtfs_loader.get_station(stop_id)
+        except ValueError:
+            raise NotFound(f"Station not found: {stop_id}")
+
+        arrivals = self.tracker.get_arrivals(station)
+        client = self.tracker.mta_client
+        return {
+            "station": station_to_dict(station),
+            "arrivals": arrivals_to_dict(arrivals),
+            "updated": datetime.now().isoformat(timespec="seconds"),
+            "data_age": client.data_age(client.feed_urls_for_routes(station.lines)),
+        }
+
+    def _render_alerts(self, route_ids: List[str]) -> List[dict]:
+        """Alerts for the given routes, or every route when none are given."""
+        if not route_ids:
+            route_ids = sorted(self.tracker.gtfs_loader.routes)
+        return [alert_to_dict(alert) for alert in self.tracker.mta_client.get_alerts_for_routes(route_ids)]
+
+    def _stream_stations(self, target: str) -> List[Station]:
+        """Stations requested by a /stream target."""
+        parts = urlsplit(target)
+        stop_ids = [
+            stop_id
+            for value in parse_qs(parts.query).get("stations", [])
+            for stop_id in value.split(",")
+            if stop_id
+        ]
+        if not stop_ids:
+            raise NotFound("No stations given; use /stream?stations=<stop_id>,...")
+
+        stations = []
+        for stop_id in dict.fromkeys(stop_ids):
+            try:
+                stations.append(self.tracker.gtfs_loader.get_station(stop_id))
+            except ValueError:
+                raise NotFound(f"Station not found: {stop_id}")
+        return stations
+
+    def _make_handler(self):
+        """Build the request handler class bound to this server."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if urlsplit(self.path).path.rstrip("/") == "/stream":
+                    self._stream()
+                    return
+
+                try:
+                    body, etag = server.get_body(self.path)
+                except NotFound as e:
+                    self._send_json(404, {"error": str(e)})
+                    return
+                except Exception as e:
+                    logger.error(f"Failed to serve {self.path}: {e}", exc_info=True)
+                    self._send_json(500, {"error": "Internal server error"})
+                    return
+
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self):
+                try:
+                    stations = server._stream_stations(self.path)
+                except NotFound as e:
+                    self._send_json(404, {"error": str(e)})
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                client = server.streams.open(stations)
+                try:
+                    while True:
+                        try:
+                            event = client.get(timeout=STREAM_KEEPALIVE)
+                        except queue.Empty:
+                            event = b": keepalive\n\n"
+                        if event is None:
+                            return
+                        self.wfile.write(event)
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    logger.debug(f"Stream client {self.address_string()} disconnected")
+                finally:
+                    server.streams.close(client)
+
+            def _send_json(self, status: int, payload: dict):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"{self.address_string()} {format % args}")
+
+        return Handler
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Serve MTA subway arrivals as JSON")
+    parser.add_argument("--host", default="0.0.0.0", help="Interface to bind (default: all)")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    parser.add_argument("--cache-ttl", type=float, default=5.0, help="Seconds to reuse rendered responses")
+    parser.add_argument(
+        "--poll-interval", type=float, default=5.0, help="Seconds between feed checks for streams"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    # Same certificate handling as MTAClient's default urlopen path
+    transport = PooledHTTPTransport(ssl_context=ssl._create_unverified_context())
+    # No stale-while-revalidate, and a TTL under the poll interval, so every poll
+    # revalidates the feeds it needs and a change reaches streams by the next poll.
+    # Unchanged feeds cost a 304 and no re-parse.
+    client = MTAClient(transport=transport, cache_ttl=args.poll_interval / 2)
+    tracker = MTAStationTracker(mta_client=client)
+    tracker.poll_interval = args.poll_interval
+    tracker.start_background_refresh()
+
+    server = ArrivalsServer(tracker, host=args.host, port=args.port, cache_ttl=args.cache_ttl)
+    logger.info(f"Serving arrivals on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        tracker.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Grid-bucket spatial index for nearest-station queries."""
+
+import heapq
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_DEGREE_LAT = 111320.0
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in meters between two lat/lon points."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class StationGrid:
+    """
+    Buckets points into fixed-size lat/lon cells.
+
+    Nearest-neighbour queries scan rings of cells outward from the query point and
+    stop as soon as no unscanned cell can hold anything closer than the current k-th
+    best, so a query touches a handful of cells instead of every station. Only cells
+    inside the grid's extent are visited. Queries outside the extent (e.g. unset or
+    swapped coordinates) scan every point instead, since the ring bound only holds
+    over short distances.
+    """
+
+    def __init__(self, points: Iterable[Tuple[str, float, float]], cell_deg: float = 0.01):
+        """
+        Build the grid.
+
+        Args:
+            points: (stop_id, latitude, longitude) tuples.
+            cell_deg: Cell size in degrees (0.01 is roughly 1 km in NYC).
+        """
+        self.cell_deg = cell_deg
+        self.size = 0
+        self._cells: Dict[Tuple[int, int], List[Tuple[str, float, float]]] = {}
+        self._max_abs_lat = 0.0
+
+        for stop_id, lat, lon in points:
+            key = self._cell(lat, lon)
+            if key not in self._cells:
+                self._cells[key] = []
+            self._cells[key].append((stop_id, lat, lon))
+            self._max_abs_lat = max(self._max_abs_lat, abs(lat))
+            self.size += 1
+
+        if self._cells:
+            self._min_x = min(x for x, _ in self._cells)
+            self._max_x = max(x for x, _ in self._cells)
+            self._min_y = min(y for _, y in self._cells)
+            self._max_y = max(y for _, y in self._cells)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Get the cell key containing a point."""
+        return (math.floor(lon / self.cell_deg), math.floor(lat / self.cell_deg))
+
+    def nearest(
+        self, lat: float, lon: float, k: int = 5, max_distance_m: Optional[float] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the k nearest points.
+
+        Args:
+            lat: Query latitude.
+            lon: Query longitude.
+            k: Maximum number of results.
+            max_distance_m: Optional cut-off distance in meters.
+
+        Returns:
+            List of (stop_id, distance_m) sorted by distance.
+        """
+        if not self._cells or k <= 0:
+            return []
+
+        cx, cy = self._cell(lat, lon)
+        if not (self._min_x <= cx <= self._max_x and self._min_y <= cy <= self._max_y):
+            return self._scan(lat, lon, k, max_distance_m)
+
+        # Narrowest cell edge in meters (longitude cells shrink away from the equator)
+        widest_lat = max(self._max_abs_lat, abs(lat))
+        cell_m = self.cell_deg * METERS_PER_DEGREE_LAT * math.cos(math.radians(min(widest_lat, 89.0)))
+        max_ring = max(
+            abs(cx - self._min_x), abs(cx - self._max_x), abs(cy - self._min_y), abs(cy - self._max_y)
+        )
+
+        best: List[Tuple[float, str]] = []  # Max-heap of (-distance, stop_id), size <= k
+        ring = 0
+        while ring <= max_ring:
+            for key in self._ring_cells(cx, cy, ring):
+                self._push_nearest(best, k, lat, lon, self._cells.get(key, ()), max_distance_m)
+
+            # Everything outside rings 0..ring is at least this far away
+            covered_m = ring * cell_m
+            if len(best) >= k and -best[0][0] <= covered_m:
+                break
+            if max_distance_m is not None and covered_m >= max_distance_m:
+                break
+            ring += 1
+
+        return sorted(((stop_id, -neg) for neg, stop_id in best), key=lambda item: item[1])
+
+    def _scan(self, lat: float, lon: float, k: int, max_distance_m: Optional[float]) -> List[Tuple[str, float]]:
+        """Find the k nearest points by checking every point."""
+        best: List[Tuple[float, str]] = []
+        for points in self._cells.values():
+            self._push_nearest(best, k, lat, lon, points, max_distance_m)
+        return sorted(((stop_id, -neg) for neg, stop_id in best), key=lambda item: item[1])
+
+    @staticmethod
+    def _push_nearest(
+        best: List[Tuple[float, str]],
+        k: int,
+        lat: float,
+        lon: float,
+        points: Iterable[Tuple[str, float, float]],
+        max_distance_m: Optional[float],
+    ) -> None:
+        """Add points closer than the current k-th best to the max-heap `best`."""
+        for stop_id, p_lat, p_lon in points:
+            distance = haversine_m(lat, lon, p_lat, p_lon)
+            if max_distance_m is not None and distance > max_distance_m:
+                continue
+            if len(best) < k:
+                heapq.heappush(best, (-distance, stop_id))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, stop_id))
+
+    def _ring_cells(self, cx: int, cy: int, ring: int) -> Iterable[Tuple[int, int]]:
+        """Yield the cells exactly `ring` cells away from (cx, cy) that lie inside the grid's extent."""
+        if ring == 0:
+            yield (cx, cy)
+            return
+        x_lo, x_hi = max(cx - ring, self._min_x), min(cx + ring, self._max_x)
+        for y in (cy - ring, cy + ring):
+            if self._min_y <= y <= self._max_y:
+                for x in range(x_lo, x_hi + 1):
+                    yield (x, y)
+        y_lo, y_hi = max(cy - ring + 1, self._min_y), min(cy + ring - 1, self._max_y)
+        for x in (cx - ring, cx + ring):
+            if self._min_x <= x <= self._max_x:
+                for y in range(y_lo, y_hi + 1):
+                    yield (x, y)
@@ -1,15 +1,31 @@
 """Main MTA Station Tracker class."""
 
 import logging
-from typing import Dict, List, Optional
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
-from .models import Station, StationData, Alert
-from .gtfs_loader import GTFSLoader
+from .models import Station, StationCatalog, StationData, Alert, Train
+from .gtfs_loader import GTFSLoader, DEFAULT_CACHE_DIR, MTA_GTFS_URL
 from .mta_client import MTAClient
 
 logger = logging.getLogger(__name__)
 
+# Minimum fuzzy score for get_station() to resolve a typo on its own;
+# fuzzy_find_stations() keeps its lenient default for pickers that show candidates
+FUZZY_RESOLVE_MIN_SCORE = 0.6
+
+
+class _Subscription:
+    """A subscriber and the arrivals it was last sent."""
+
+    __slots__ = ("station", "callback", "last")
+
+    def __init__(self, station: Station, callback: Callable[[Station, Dict[str, List[tuple]]], None]):
+        self.station = station
+        self.callback = callback
+        self.last: Optional[Dict[str, List[tuple]]] = None
+
 
 class MTAStationTracker:
     """
@@ -21,16 +37,32 @@ class MTAStationTracker:
     - Get service alerts for the station's lines
     """
 
-    def __init__(self, load_gtfs: bool = True):
+    def __init__(
+        self,
+        load_gtfs: bool = True,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+        mta_client: Optional[MTAClient] = None,
+    ):
         """
         Initialize the tracker.
 
         Args:
             load_gtfs: If True, download and load GTFS data on init. If False, must call
                       load_gtfs_from_files() or load_gtfs_from_url() manually.
+            cache_dir: Directory for the GTFS index snapshot. None disables it.
+            mta_client: Realtime client to use, e.g. MTAClient(stale_while_revalidate=True).
+                       Defaults to a new MTAClient().
         """
-        self.gtfs_loader = GTFSLoader()
-        self.mta_client = MTAClient()
+        self.gtfs_loader = GTFSLoader(cache_dir=cache_dir)
+        self.mta_client = mta_client if mta_client is not None else MTAClient()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._refresh_stop = threading.Event()
+        self.poll_interval = 15.0  # Seconds between subscription polls
+        self._subscriptions: Dict[int, _Subscription] = {}
+        self._subscriptions_lock = threading.Lock()
+        self._next_subscription = 0
+        self._poll_thread: Optional[threading.Thread] = None
+        self._poll_wake = threading.Event()
 
         if load_gtfs:
             try:
@@ -39,7 +71,9 @@ class MTAStationTracker:
                 logger.error(f"Failed to load GTFS from URL: {e}")
                 raise
 
-    def load_gtfs_from_files(self, stops_path: str, routes_path: str, stop_times_path: str) -> None:
+    def load_gtfs_from_files(
+        self, stops_path: str, routes_path: str, stop_times_path: str, trips_path: Optional[str] = None
+    ) -> None:
         """
         Load GTFS static data from local files.
 
@@ -47,8 +81,165 @@ class MTAStationTracker:
             stops_path: Path to stops.txt
             routes_path: Path to routes.txt
             stop_times_path: Path to stop_times.txt
+            trips_path: Optional path to trips.txt (maps trips to routes)
+        """
+        self.gtfs_loader.load_from_files(stops_path, routes_path, stop_times_path, trips_path)
+
+    def refresh_gtfs(self, url: str = MTA_GTFS_URL) -> bool:
+        """
+        Reload GTFS static data into a new loader and swap it in if the feed changed.
+
+        The new loader is fully built before it replaces gtfs_loader, so concurrent
+        readers see either the old or the new index, never a partially loaded one.
+
+        Args:
+            url: GTFS static zip URL.
+
+        Returns:
+            True if new data was swapped in, False if the feed was unchanged.
+        """
+        current = self.gtfs_loader
+        fresh = GTFSLoader(cache_dir=current.cache_dir)
+        fresh.load_from_url(url)
+
+        if fresh.source_hash is not None and fresh.source_hash == current.source_hash:
+            logger.debug("GTFS static data unchanged")
+            return False
+
+        self.gtfs_loader = fresh
+        logger.info(f"Swapped in new GTFS data ({len(fresh.stations)} stations)")
+        return True
+
+    def start_background_refresh(self, interval: float = 6 * 3600, url: str = MTA_GTFS_URL) -> None:
         """
-        self.gtfs_loader.load_from_files(stops_path, routes_path, stop_times_path)
+        Periodically refresh GTFS static data on a background thread.
+
+        Args:
+            interval: Seconds between refresh checks.
+            url: GTFS static zip URL.
+        """
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+
+        self._refresh_stop.clear()
+
+        def run():
+            while not self._refresh_stop.wait(interval):
+                try:
+                    self.refresh_gtfs(url)
+                except Exception as e:
+                    # Keep serving the current data; try again next interval
+                    logger.warning(f"Background GTFS refresh failed: {e}")
+
+        self._refresh_thread = threading.Thread(target=run, name="gtfs-refresh", daemon=True)
+        self._refresh_thread.start()
+        logger.info(f"Started background GTFS refresh every {interval}s")
+
+    def stop_background_refresh(self) -> None:
+        """Stop the background GTFS refresh thread."""
+        self._refresh_stop.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout=5)
+            self._refresh_thread = None
+
+    def subscribe(self, station_input, callback: Callable[[Station, Dict[str, List[tuple]]], None]) -> int:
+        """
+        Call back whenever a station's arrivals change.
+
+        All subscriptions share one background poller: every poll_interval seconds it
+        fetches arrivals for every subscribed station in one get_arrivals_many() call
+        (each feed fetched once) and calls back only for subscriptions whose arrivals
+        differ from what they last received. The first callback comes right after
+        subscribing.
+
+        Callbacks run on the poller thread; GUI code should hand the update to its own
+        event loop (e.g., Tk's after()).
+
+        Args:
+            station_input: Station object, or station ID or name.
+            callback: Called as callback(station, arrivals) with arrivals in the
+                get_arrivals() format.
+
+        Returns:
+            Subscription token for unsubscribe().
+        """
+        station = station_input if isinstance(station_input, Station) else self.get_station(station_input)
+
+        with self._subscriptions_lock:
+            self._next_subscription += 1
+            token = self._next_subscription
+            self._subscriptions[token] = _Subscription(station, callback)
+
+            if self._poll_thread is None or not self._poll_thread.is_alive():
+                self._poll_thread = threading.Thread(target=self._poll_loop, name="arrivals-poller", daemon=True)
+                self._poll_thread.start()
+                logger.info(f"Started arrivals poller every {self.poll_interval}s")
+
+        # Deliver the first update without waiting out the interval
+        self._poll_wake.set()
+        return token
+
+    def unsubscribe(self, token: int) -> None:
+        """
+        Cancel a subscription. The poller stops when none are left.
+
+        Args:
+            token: Token returned by subscribe().
+        """
+        with self._subscriptions_lock:
+            self._subscriptions.pop(token, None)
+            if self._subscriptions:
+                return
+            poll_thread = self._poll_thread
+
+        # Wake the poller so it sees there is nothing left and exits
+        self._poll_wake.set()
+        if poll_thread is not None and poll_thread is not threading.current_thread():
+            poll_thread.join(timeout=5)
+
+    def _poll_loop(self) -> None:
+        """Poll subscribed stations until no subscriptions remain."""
+        while True:
+            self._poll_wake.clear()
+            with self._subscriptions_lock:
+                if not self._subscriptions:
+                    self._poll_thread = None
+                    logger.info("Stopped arrivals poller")
+                    return
+            self._poll_subscriptions()
+            self._poll_wake.wait(self.poll_interval)
+
+    def _poll_subscriptions(self) -> None:
+        """Fetch arrivals for all subscribed stations once and call back where they changed."""
+        with self._subscriptions_lock:
+            subscriptions = list(self._subscriptions.items())
+        if not subscriptions:
+            return
+
+        stations = {sub.station.stop_id: sub.station for _, sub in subscriptions}
+        try:
+            arrivals = self._poll_arrivals(list(stations.values()))
+        except Exception as e:
+            # Keep the last delivered arrivals; try again next interval
+            logger.warning(f"Arrivals poll failed: {e}")
+            return
+
+        for token, sub in subscriptions:
+            current = arrivals.get(sub.station.stop_id)
+            if current is None or current == sub.last:
+                continue
+            with self._subscriptions_lock:
+                if token not in self._subscriptions:
+                    continue  # Unsubscribed during this poll
+            sub.last = current
+            try:
+                sub.callback(sub.station, current)
+            except Exception as e:
+                logger.error(f"Subscriber callback for {sub.station.stop_id} failed: {e}", exc_info=True)
+
+    def _poll_arrivals(self, stations: List[Station]) -> Dict[str, Dict[str, List[tuple]]]:
+        """Fetch arrivals for the subscription poller (get_arrivals_many() on this thread)."""
+        return self.get_arrivals_many(stations)
 
     def get_station(self, station_input: str) -> Station:
         """
@@ -61,20 +252,27 @@ class MTAStationTracker:
             Station object.
 
         Raises:
-            ValueError: If station not found.
+            ValueError: If station not found, or a misspelled name has no close match.
         """
+        loader = self.gtfs_loader  # One snapshot of the index for the whole lookup
+
         # Try as stop ID first
         try:
-            return self.gtfs_loader.get_station(station_input)
+            return loader.get_station(station_input)
         except ValueError:
             pass
 
-        # Try as name
-        stations = self.gtfs_loader.find_stations_by_name(station_input)
-        if not stations:
+        # Try as name, best ranked match first
+        stations = loader.search_stations(station_input, limit=1)
+        if stations:
+            return stations[0]
+
+        # Fall back to typo-tolerant matching, but only for a close match
+        candidates = loader.fuzzy_find_stations(station_input, limit=1, min_score=FUZZY_RESOLVE_MIN_SCORE)
+        if not candidates:
             raise ValueError(f"No station found matching '{station_input}'")
 
-        return stations[0]
+        return candidates[0][0]
 
     def find_stations_by_name(self, name: str) -> List[Station]:
         """
@@ -88,6 +286,74 @@ class MTAStationTracker:
         """
         return self.gtfs_loader.find_stations_by_name(name)
 
+    def search_stations(self, query: str, limit: int = 10) -> List[Station]:
+        """
+        Ranked station search by name.
+
+        Args:
+            query: Full or partial station name.
+            limit: Maximum number of stations to return.
+
+        Returns:
+            Parent stations, best match first.
+        """
+        return self.gtfs_loader.search_stations(query, limit)
+
+    def fuzzy_find_stations(
+        self, query: str, limit: int = 5, min_score: float = 0.3
+    ) -> List[Tuple[Station, float]]:
+        """
+        Typo-tolerant station lookup with scores.
+
+        Args:
+            query: Possibly misspelled station name (e.g., "Tims Sq").
+            limit: Maximum number of stations to return.
+            min_score: Minimum similarity in (0, 1].
+
+        Returns:
+            List of (Station, score), best match first.
+        """
+        return self.gtfs_loader.fuzzy_find_stations(query, limit, min_score)
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[str]:
+        """
+        Complete a partially typed station name.
+
+        Args:
+            prefix: Text typed so far; each word may be partial.
+            limit: Maximum number of names to return.
+
+        Returns:
+            Station names, best match first.
+        """
+        return self.gtfs_loader.autocomplete(prefix, limit)
+
+    def station_catalog(self) -> StationCatalog:
+        """
+        Get parent stations with disambiguated display names, sorted for listing.
+
+        Returns:
+            StationCatalog shared with other callers (read-only).
+        """
+        return self.gtfs_loader.station_catalog()
+
+    def find_nearest_stations(
+        self, lat: float, lon: float, k: int = 5, max_distance_m: Optional[float] = None
+    ) -> List[Tuple[Station, float]]:
+        """
+        Find the stations closest to a location.
+
+        Args:
+            lat: Latitude.
+            lon: Longitude.
+            k: Maximum number of stations to return.
+            max_distance_m: Optional cut-off distance in meters.
+
+        Returns:
+            List of (Station, distance in meters) sorted by distance.
+        """
+        return self.gtfs_loader.find_nearest_stations(lat, lon, k, max_distance_m)
+
     @staticmethod
     def _get_borough(lat: float, lon: float) -> Optional[str]:
         """
@@ -132,9 +398,47 @@ class MTAStationTracker:
         """
         # Get all arrivals for this stop (include related platform IDs)
         related_stop_ids = self.gtfs_loader.get_related_stop_ids(station.stop_id)
-        arrivals = self.mta_client.get_arrivals_for_stop(station.stop_id, related_stop_ids=related_stop_ids)
+        # Only fetch the feeds that carry this station's routes
+        feed_urls = self.mta_client.feed_urls_for_routes(station.lines)
+        arrivals = self.mta_client.get_arrivals_for_stop(
+            station.stop_id, feed_urls=feed_urls, related_stop_ids=related_stop_ids
+        )
+
+        return self._group_arrivals(station, arrivals)
+
+    def get_arrivals_many(self, stations: List[Station]) -> Dict[str, Dict[str, List[tuple]]]:
+        """
+        Get closest arriving trains for several stations in one refresh.
+
+        Every needed feed is fetched and indexed once for the whole batch, so the cost
+        scales with feed size rather than stations x feed size.
 
-        # Group by route and direction
+        Args:
+            stations: Station objects (from get_station()).
+
+        Returns:
+            Dictionary of station stop_id -> arrivals in the same format as get_arrivals().
+        """
+        stop_groups, feed_urls = self._batch_request(stations)
+        trains = self.mta_client.get_arrivals_for_stops(stop_groups, feed_urls=feed_urls)
+        return {station.stop_id: self._group_arrivals(station, trains[station.stop_id]) for station in stations}
+
+    def _batch_request(self, stations: List[Station]) -> Tuple[Dict[str, List[str]], Optional[List[str]]]:
+        """Get the stop groups and feed URLs (None for all) covering several stations."""
+        loader = self.gtfs_loader
+        stop_groups = {station.stop_id: loader.get_related_stop_ids(station.stop_id) for station in stations}
+
+        # A station without known lines could be on any feed
+        if all(station.lines for station in stations):
+            route_ids = sorted({route_id for station in stations for route_id in station.lines})
+            feed_urls = self.mta_client.feed_urls_for_routes(route_ids)
+        else:
+            feed_urls = None
+
+        return stop_groups, feed_urls
+
+    def _group_arrivals(self, station: Station, arrivals: List[Train]) -> Dict[str, List[tuple]]:
+        """Group a station's trains by direction label, sorted by route then minutes."""
         result: Dict[str, List[tuple]] = {}
 
         station_borough = self._get_borough(station.latitude, station.longitude)
@@ -182,14 +486,19 @@ class MTAStationTracker:
             StationData object with station info, arrivals, and alerts.
         """
         station = self.get_station(station_input)
+
+        # Fetch alerts alongside arrivals on the client's worker pool; if both need the
+        # main feed, the client downloads it once and the other caller waits for that result
+        alerts_future = self.mta_client.executor.submit(self.get_alerts, station)
         arrivals = self.get_arrivals(station)
-        alerts = self.get_alerts(station)
+        alerts = alerts_future.result()
 
         return StationData(
             station=station,
             trains_by_direction=arrivals,
             alerts=alerts,
             last_updated=datetime.now(),
+            data_age=self.mta_client.data_age(self.mta_client.feed_urls_for_routes(station.lines)),
         )
 
     @staticmethod
@@ -262,8 +571,14 @@ class MTAStationTracker:
 
     def cleanup(self) -> None:
         """Release resources and clear caches."""
+        self.stop_background_refresh()
+        with self._subscriptions_lock:
+            tokens = list(self._subscriptions)
+        for token in tokens:
+            self.unsubscribe(token)
         if self.mta_client:
             self.mta_client.clear_cache()
+            self.mta_client.close()
         if self.gtfs_loader:
             # Don't clear GTFS data by default as it's expensive to reload
             # but provide the option
@@ -0,0 +1,145 @@
+"""HTTP transports for fetching realtime feeds."""
+
+import http.client
+import logging
+import ssl
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning a pooled connection was closed by the server while idle
+_DEAD_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+@dataclass
+class TransportResponse:
+    """A completed HTTP response."""
+    status: int
+    headers: Dict[str, str]  # Lowercased header names
+    body: bytes
+
+
+class PooledHTTPTransport:
+    """
+    Keeps HTTP(S) connections open between requests, per host.
+
+    A refresh of every subway feed then reuses a few warm connections to the MTA
+    endpoint instead of paying a TCP and TLS handshake per feed. A request that finds
+    a reused connection closed by the server is retried once on a new connection;
+    timeouts and other errors are raised straight away. Redirects are not followed.
+
+    MTAClient(transport=PooledHTTPTransport()) uses it for feed downloads.
+    """
+
+    def __init__(self, ssl_context: Optional[ssl.SSLContext] = None, max_idle_per_host: int = 8):
+        """
+        Initialize the transport.
+
+        Args:
+            ssl_context: SSL context for https URLs. Defaults to ssl.create_default_context().
+            max_idle_per_host: Idle connections kept open per host; extras are closed.
+        """
+        self._ssl_context = ssl_context if ssl_context is not None else ssl.create_default_context()
+        self._max_idle_per_host = max_idle_per_host
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 10.0) -> TransportResponse:
+        """
+        GET a URL over a pooled connection.
+
+        Args:
+            url: http or https URL.
+            headers: Extra request headers.
+            timeout: Socket timeout in seconds.
+
+        Returns:
+            TransportResponse for any status below 400.
+
+        Raises:
+            HTTPError: For 4xx and 5xx responses, as urlopen does.
+            OSError, http.client.HTTPException: If the request fails or times out.
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        conn = self._take_idle(key, timeout)
+        if conn is None:
+            conn = self._connect(key, timeout)
+            response, body = self._send(conn, path, headers)
+        else:
+            try:
+                response, body = self._send(conn, path, headers)
+            except _DEAD_CONNECTION_ERRORS as e:
+                logger.debug(f"Reconnecting to {parts.hostname} after error on idle connection: {e}")
+                conn = self._connect(key, timeout)
+                response, body = self._send(conn, path, headers)
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+
+        response_headers = {name.lower(): value for name, value in response.getheaders()}
+        if response.status >= 400:
+            raise HTTPError(url, response.status, response.reason, response.msg, None)
+        return TransportResponse(response.status, response_headers, body)
+
+    @staticmethod
+    def _send(
+        conn: http.client.HTTPConnection, path: str, headers: Optional[Dict[str, str]]
+    ) -> Tuple[http.client.HTTPResponse, bytes]:
+        """Send a GET and read the whole response, closing the connection on any error."""
+        try:
+            conn.request("GET", path, headers=headers or {})
+            response = conn.getresponse()
+            return response, response.read()
+        except BaseException:
+            conn.close()
+            raise
+
+    def _take_idle(self, key: Tuple[str, str, int], timeout: float) -> Optional[http.client.HTTPConnection]:
+        """Take an idle connection for key, or None if there is none."""
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+        return conn
+
+    def _connect(self, key: Tuple[str, str, int], timeout: float) -> http.client.HTTPConnection:
+        """Open a new connection for key (connects on first request)."""
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _release(self, key: Tuple[str, str, int], conn: http.client.HTTPConnection) -> None:
+        """Return a connection to the idle pool."""
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self._max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle.clear()
+        for idle in pools:
+            for conn in idle:
+                conn.close()
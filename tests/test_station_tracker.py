@@ -1,8 +1,24 @@
 """Tests for MTAStationTracker."""
 
+import asyncio
+import gc
+import gzip
+import http.client
+import io
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
 import unittest
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
 import time
 import sys
 from pathlib import Path
@@ -13,7 +29,122 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 from traintrack.models import Station, Train, Alert
 from traintrack.station_tracker import MTAStationTracker
 from traintrack.gtfs_loader import GTFSLoader
-from traintrack.mta_client import MTAClient
+from traintrack import gtfs_loader
+from traintrack.spatial import StationGrid, haversine_m
+from traintrack.mta_client import MTAClient, MTA_FEEDS, CircuitOpenError
+from traintrack.transport import PooledHTTPTransport, TransportResponse
+from traintrack.async_client import AsyncMTAClient
+from traintrack.async_tracker import AsyncMTAStationTracker
+from traintrack import server as server_module
+from traintrack.server import ArrivalsServer, diff_arrivals
+
+SAMPLE_STOPS = """stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station
+127,Times Sq-42 St,40.75529,-73.987495,1,
+127N,Times Sq-42 St,40.75529,-73.987495,,127
+127S,Times Sq-42 St,40.75529,-73.987495,,127
+L06,1 Av,40.730953,-73.981628,1,
+L06N,1 Av,40.730953,-73.981628,,L06
+L06S,1 Av,40.730953,-73.981628,,L06
+"""
+
+SAMPLE_ROUTES = """route_id,agency_id,route_short_name,route_long_name
+1,MTA NYCT,1,Broadway - 7 Avenue Local
+2,MTA NYCT,2,7 Avenue Express
+L,MTA NYCT,L,14 St-Canarsie Local
+"""
+
+SAMPLE_STOP_TIMES = """trip_id,stop_id,arrival_time,departure_time,stop_sequence
+AFA25GEN-1038-Weekday-00_000600_1..S03R,127S,00:06:00,00:06:00,1
+AFA25GEN-1038-Weekday-00_000700_2..N01R,127N,00:07:00,00:07:00,1
+AFA25GEN-L038-Weekday-00_000800_L..N01R,L06N,00:08:00,00:08:00,1
+"""
+
+
+def make_gtfs_zip(stops=SAMPLE_STOPS, routes=SAMPLE_ROUTES, stop_times=SAMPLE_STOP_TIMES,
+                  trips=None) -> bytes:
+    """Build an in-memory GTFS zip from CSV strings."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        zip_file.writestr("stops.txt", stops)
+        zip_file.writestr("routes.txt", routes)
+        zip_file.writestr("stop_times.txt", stop_times)
+        if trips is not None:
+            zip_file.writestr("trips.txt", trips)
+    return buffer.getvalue()
+
+
+def load_sample_gtfs(tracker):
+    """Load the SAMPLE_* GTFS tables into a tracker."""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name, content in (("stops", SAMPLE_STOPS), ("routes", SAMPLE_ROUTES), ("stop_times", SAMPLE_STOP_TIMES)):
+            path = os.path.join(tmp, f"{name}.txt")
+            with open(path, "w") as f:
+                f.write(content)
+            paths.append(path)
+        tracker.load_gtfs_from_files(*paths)
+
+
+class StandInServer:
+    """Local HTTP server standing in for an MTA endpoint.
+
+    Serves `body` with an ETag and answers matching If-None-Match with 304. With
+    compress=True the body is gzipped for clients that accept it. While `hang` is
+    set, requests are recorded but not answered until the server exits. `status`
+    sets the status of full responses (e.g. 302 to stand in for a redirect).
+    Every request's headers are recorded in `requests`, and the client address of
+    each connection in `connections`.
+    """
+
+    def __init__(self, body: bytes, etag: str = '"v1"', compress: bool = False):
+        self.body = body
+        self.etag = etag
+        self.compress = compress
+        self.hang = False
+        self.status = 200
+        self._released = threading.Event()
+        self.requests = []
+        self.connections = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Allow keep-alive
+
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                server.connections.add(self.client_address)
+                if server.hang:
+                    server._released.wait(10)
+                    return
+                if self.headers.get("If-None-Match") == server.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = server.body
+                self.send_response(server.status)
+                self.send_header("ETag", server.etag)
+                if server.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/feed"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._released.set()
+        self._httpd.shutdown()
+        self._httpd.server_close()
 
 
 class TestGTFSLoader(unittest.TestCase):
@@ -64,6 +195,249 @@ R746S,R746S,42 St-Times Sq,42nd Street-Times Square Station,40.7539,-73.9905,,,,
         with self.assertRaises(ValueError):
             loader.get_station("NONEXISTENT")
 
+    @patch("traintrack.gtfs_loader.urlopen")
+    def test_snapshot_skips_parsing_for_same_zip(self, mock_urlopen):
+        """Test that a second load of the same zip comes from the snapshot."""
+        mock_response = mock_urlopen.return_value.__enter__.return_value
+        mock_response.headers = {}
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            mock_response.read.side_effect = io.BytesIO(make_gtfs_zip()).read
+            first = GTFSLoader(cache_dir=cache_dir)
+            first.load_from_url()
+            self.assertTrue(os.path.exists(os.path.join(cache_dir, gtfs_loader.SNAPSHOT_FILENAME)))
+
+            mock_response.read.side_effect = io.BytesIO(make_gtfs_zip()).read
+            second = GTFSLoader(cache_dir=cache_dir)
+            with patch.object(GTFSLoader, "_load_stop_times") as mock_stop_times:
+                second.load_from_url()
+                mock_stop_times.assert_not_called()
+
+        self.assertEqual(second.source_hash, first.source_hash)
+        self.assertEqual(second.stations, first.stations)
+        self.assertEqual(second.stations["127"].lines, first.stations["127"].lines)
+        self.assertEqual(second.stops_by_route, first.stops_by_route)
+        self.assertEqual(second.stop_to_parent, first.stop_to_parent)
+        self.assertEqual(second.get_related_stop_ids("127"), ["127N", "127S"])
+
+    def test_conditional_download_reuses_local_zip(self):
+        """Test that an unchanged GTFS zip is revalidated instead of re-downloaded."""
+        with tempfile.TemporaryDirectory() as cache_dir, StandInServer(make_gtfs_zip()) as server:
+            first = GTFSLoader(cache_dir=cache_dir)
+            first.load_from_url(server.url)
+
+            second = GTFSLoader(cache_dir=cache_dir)
+            second.load_from_url(server.url)
+
+            # A new zip on the server is downloaded again
+            server.body = make_gtfs_zip(stops=SAMPLE_STOPS.replace("1 Av", "First Av"))
+            server.etag = '"v2"'
+            third = GTFSLoader(cache_dir=cache_dir)
+            third.load_from_url(server.url)
+
+        self.assertNotIn("If-None-Match", server.requests[0])
+        self.assertEqual(server.requests[1]["If-None-Match"], '"v1"')
+        self.assertEqual(len(second.stations), len(first.stations))
+        self.assertEqual(second.source_hash, first.source_hash)
+        self.assertEqual(third.stations["L06"].name, "First Av")
+
+    def test_offline_start_falls_back_to_snapshot(self):
+        """Test that a failed GTFS download loads the cached snapshot, and fails without one."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with StandInServer(make_gtfs_zip()) as server:
+                online = GTFSLoader(cache_dir=cache_dir)
+                online.load_from_url(server.url)
+
+            with patch("traintrack.gtfs_loader.urlopen", side_effect=URLError("network is unreachable")):
+                offline = GTFSLoader(cache_dir=cache_dir)
+                with self.assertLogs("traintrack.gtfs_loader", level="WARNING") as logs:
+                    offline.load_from_url(server.url)
+
+                with self.assertRaises(URLError):
+                    GTFSLoader(cache_dir=None).load_from_url(server.url)
+
+        self.assertEqual(offline.stations, online.stations)
+        self.assertEqual(offline.source_hash, online.source_hash)
+        self.assertIn("may be stale", "\n".join(logs.output))
+
+    def test_streaming_load_from_url_and_files(self):
+        """Test that zip members and local files are parsed as streams, not strings."""
+        with StandInServer(make_gtfs_zip()) as server:
+            from_url = GTFSLoader(cache_dir=None)
+            with patch.object(
+                GTFSLoader, "_load_stop_times", autospec=True, side_effect=GTFSLoader._load_stop_times
+            ) as mock_stop_times:
+                from_url.load_from_url(server.url)
+            self.assertNotIsInstance(mock_stop_times.call_args[0][1], str)
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            paths = []
+            for name, content in [("stops.txt", SAMPLE_STOPS), ("routes.txt", SAMPLE_ROUTES),
+                                  ("stop_times.txt", SAMPLE_STOP_TIMES)]:
+                path = os.path.join(data_dir, name)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(content)
+                paths.append(path)
+            from_files = GTFSLoader(cache_dir=None)
+            from_files.load_from_files(*paths)
+
+        for loader in (from_url, from_files):
+            self.assertEqual(len(loader.stations), 6)
+            self.assertEqual(loader.stations["127"].lines, ("1", "2"))
+            self.assertEqual(loader.stations["L06N"].lines, ("L",))
+
+    def test_stop_times_use_trips_txt_routes(self):
+        """Test that trips.txt resolves routes whose trip IDs don't follow the MTA pattern."""
+        stop_times = SAMPLE_STOP_TIMES + "CUSTOM-TRIP-9,L06S,00:09:00,00:09:00,1\nCUSTOM-TRIP-9,127S,00:19:00,00:19:00,2\n"
+        trips = "route_id,service_id,trip_id\nL,Weekday,CUSTOM-TRIP-9\n"
+
+        with StandInServer(make_gtfs_zip(stop_times=stop_times, trips=trips)) as server:
+            loader = GTFSLoader(cache_dir=None)
+            with patch.object(
+                GTFSLoader, "_route_from_trip_id", wraps=GTFSLoader._route_from_trip_id
+            ) as mock_heuristic:
+                loader.load_from_url(server.url)
+
+        # Trips in trips.txt skip the heuristic; the rest fall back to it once per trip
+        self.assertEqual(mock_heuristic.call_count, 3)
+        self.assertEqual(loader.stations["L06S"].lines, ("L",))
+        self.assertIn("L", loader.stations["127S"].lines)
+        self.assertEqual(loader.stops_by_route["L"], {"L06N", "L06S", "127S"})
+
+    def test_stations_share_compact_line_sets(self):
+        """Test that stations are slotted and identical line sets are one shared tuple."""
+        loader = GTFSLoader(cache_dir=None)
+        loader._load_stops(SAMPLE_STOPS)
+        loader._load_routes(SAMPLE_ROUTES)
+        stop_times = SAMPLE_STOP_TIMES.replace("L06N", "L06S")
+        stop_times += "AFA25GEN-L038-Weekday-00_000900_L..N01R,L06N,00:09:00,00:09:00,1\n"
+        loader._load_stop_times(stop_times)
+
+        station = loader.stations["L06N"]
+        self.assertFalse(hasattr(station, "__dict__"))
+        self.assertEqual(station.lines, ("L",))
+        self.assertIs(station.lines, loader.stations["L06S"].lines)
+        self.assertIs(station.lines, loader.stations["L06"].lines)
+        self.assertIs(station.name, loader.stations["L06S"].name)
+
+    def test_search_and_autocomplete_ranked(self):
+        """Test ranked name search and autocomplete over the prebuilt index."""
+        loader = GTFSLoader(cache_dir=None)
+        loader._load_stops(SAMPLE_STOPS + (
+            "A27,42 St-Port Authority Bus Terminal,40.757308,-73.989735,1,\n"
+            "A27N,42 St-Port Authority Bus Terminal,40.757308,-73.989735,,A27\n"
+            "R16,Times Sq-42 St,40.754672,-73.986754,1,\n"
+            "D17,34 St-Herald Sq,40.749719,-73.987823,1,\n"
+            "L05,3 Av,40.732849,-73.986122,1,\n"
+        ))
+
+        # One result per parent station, exact and prefix matches ranked first
+        results = loader.search_stations("times sq")
+        self.assertEqual({s.stop_id for s in results}, {"127", "R16"})
+        self.assertEqual([s.stop_id for s in loader.search_stations("42 st")], ["A27", "127", "R16"])
+        self.assertEqual([s.stop_id for s in loader.search_stations("port auth")], ["A27"])
+        self.assertEqual(loader.search_stations("nowhere"), [])
+
+        self.assertEqual(loader.autocomplete("tim"), ["Times Sq-42 St"])
+        self.assertEqual(loader.autocomplete("42 st p"), ["42 St-Port Authority Bus Terminal"])
+        self.assertEqual(loader.autocomplete("sq"), ["Times Sq-42 St", "34 St-Herald Sq"])
+        self.assertEqual(loader.autocomplete("av"), ["1 Av", "3 Av"])
+
+        # Substring search ignores punctuation and keeps load order
+        names = [s.stop_id for s in loader.find_stations_by_name("sq 42")]
+        self.assertEqual(names, ["127", "127N", "127S", "R16"])
+        self.assertEqual([s.stop_id for s in loader.find_stations_by_name("Av")], ["L06", "L06N", "L06S", "L05"])
+
+    def test_fuzzy_find_stations_tolerates_typos(self):
+        """Test typo-tolerant lookup returns scored candidates, best first."""
+        loader = GTFSLoader(cache_dir=None)
+        loader._load_stops(SAMPLE_STOPS + (
+            "D17,34 St-Herald Sq,40.749719,-73.987823,1,\n"
+            "A27,42 St-Port Authority Bus Terminal,40.757308,-73.989735,1,\n"
+        ))
+
+        results = loader.fuzzy_find_stations("Tims Sq")
+        self.assertEqual(results[0][0].stop_id, "127")
+        self.assertGreater(results[0][1], 0.5)
+        self.assertEqual([s.stop_id for s, _ in loader.fuzzy_find_stations("Harald Sqare")][:1], ["D17"])
+        self.assertEqual(loader.fuzzy_find_stations("Port Athority")[0][0].stop_id, "A27")
+
+        # Exact matches keep the top score; unrelated text matches nothing
+        self.assertEqual(loader.fuzzy_find_stations("1 Av")[0], (loader.stations["L06"], 1.0))
+        self.assertEqual(loader.fuzzy_find_stations("xyzzy"), [])
+
+    def test_station_catalog_cached_and_disambiguated(self):
+        """Test the display-name catalog is built once per load and names duplicates."""
+        loader = GTFSLoader(cache_dir=None)
+        loader._load_stops(SAMPLE_STOPS + "R16,Times Sq-42 St,40.754672,-73.986754,1,\n")
+
+        catalog = loader.station_catalog()
+        self.assertEqual(catalog.display_names, {
+            "127": "Times Sq-42 St (127)",
+            "L06": "1 Av",
+            "R16": "Times Sq-42 St (R16)",
+        })
+        self.assertEqual([stop_id for stop_id, _ in catalog.sorted_items], ["L06", "127", "R16"])
+        self.assertEqual(catalog.stop_ids_by_display["1 Av"], "L06")
+        self.assertIs(loader.station_catalog(), catalog)
+
+        # Reloading invalidates the cached catalog
+        loader.clear()
+        loader._load_stops(SAMPLE_STOPS)
+        self.assertEqual(loader.station_catalog().display_names["127"], "Times Sq-42 St")
+
+    def test_find_nearest_stations(self):
+        """Test nearest-station queries over parent stations."""
+        loader = GTFSLoader(cache_dir=None)
+        loader._load_stops(SAMPLE_STOPS)
+
+        results = loader.find_nearest_stations(40.7527, -73.9772, k=5)
+        self.assertEqual([station.stop_id for station, _ in results], ["127", "L06"])
+        self.assertAlmostEqual(results[0][1], 914, delta=5)
+        self.assertLess(results[0][1], results[1][1])
+
+        self.assertEqual(len(loader.find_nearest_stations(40.7527, -73.9772, k=1)), 1)
+        within_km = loader.find_nearest_stations(40.7527, -73.9772, k=5, max_distance_m=1000)
+        self.assertEqual([station.stop_id for station, _ in within_km], ["127"])
+
+    def test_spatial_index_matches_brute_force(self):
+        """Test that the grid returns the same neighbours as a full scan."""
+        rng = random.Random(7)
+        points = [(f"S{i}", rng.uniform(40.5, 40.9), rng.uniform(-74.2, -73.7)) for i in range(400)]
+        grid = StationGrid(points)
+
+        for _ in range(25):
+            lat, lon = rng.uniform(40.45, 40.95), rng.uniform(-74.25, -73.65)
+            expected = sorted((haversine_m(lat, lon, p_lat, p_lon), stop_id) for stop_id, p_lat, p_lon in points)
+            self.assertEqual([stop_id for stop_id, _ in grid.nearest(lat, lon, k=4)],
+                             [stop_id for _, stop_id in expected[:4]])
+
+    def test_spatial_index_far_query_matches_brute_force(self):
+        """Test that queries far outside the grid (unset or swapped coordinates) stay fast and exact."""
+        rng = random.Random(11)
+        points = [(f"S{i}", rng.uniform(40.5, 40.9), rng.uniform(-74.2, -73.7)) for i in range(500)]
+        grid = StationGrid(points)
+
+        for lat, lon in ((0.0, 0.0), (-73.9, 40.7), (40.7, 0.0), (89.0, 179.0)):
+            start = time.monotonic()
+            result = grid.nearest(lat, lon, k=3)
+            self.assertLess(time.monotonic() - start, 1.0)
+            expected = sorted((haversine_m(lat, lon, p_lat, p_lon), stop_id) for stop_id, p_lat, p_lon in points)
+            self.assertEqual([stop_id for stop_id, _ in result], [stop_id for _, stop_id in expected[:3]])
+
+    def test_snapshot_rejected_when_stale(self):
+        """Test that snapshots built from another zip or layout are ignored."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            loader = GTFSLoader(cache_dir=cache_dir)
+            loader._load_stops(SAMPLE_STOPS)
+            loader._save_snapshot("hash-a")
+
+            self.assertFalse(GTFSLoader(cache_dir=cache_dir)._load_snapshot("hash-b"))
+            self.assertTrue(GTFSLoader(cache_dir=cache_dir)._load_snapshot("hash-a"))
+
+            with patch.object(gtfs_loader, "SNAPSHOT_VERSION", gtfs_loader.SNAPSHOT_VERSION + 1):
+                self.assertFalse(GTFSLoader(cache_dir=cache_dir)._load_snapshot("hash-a"))
+
 
 class TestMTAClient(unittest.TestCase):
     """Test MTA GTFS-Realtime data fetching."""
@@ -84,6 +458,411 @@ class TestMTAClient(unittest.TestCase):
         # Verify results (would need actual protobuf mock data)
         self.assertIsInstance(arrivals, list)
 
+    def test_fetch_feeds_concurrently_with_deadline(self):
+        """Test that slow and failing feeds are dropped without stalling the rest."""
+        client = MTAClient()
+
+        def fake_fetch(url):
+            if url == "http://slow":
+                time.sleep(1.0)
+            if url == "http://broken":
+                raise OSError("connection refused")
+            time.sleep(0.1)
+            return url.encode()
+
+        urls = ["http://a", "http://b", "http://slow", "http://broken"]
+        with patch.object(client, "_fetch_feed", side_effect=fake_fetch):
+            start = time.monotonic()
+            feeds = client._fetch_feeds(urls, deadline=0.5)
+            elapsed = time.monotonic() - start
+        client.close()
+
+        self.assertEqual(list(feeds), ["http://a", "http://b"])
+        self.assertEqual(feeds["http://a"], b"http://a")
+        # Fetches overlap, so the call is bounded by the deadline rather than the sum
+        self.assertLess(elapsed, 0.9)
+
+    def test_arrivals_index_parsed_once_per_payload(self):
+        """Test that cached feed bytes are parsed once and shared across stops."""
+        client = MTAClient()
+        now = int(time.time())
+        index = {
+            "127N": [("1", 1, now + 300, "trip-1")],
+            "127S": [("2", 0, now + 90, "trip-2")],
+            "631N": [("4", 1, now - 120, "trip-3")],  # Stale prediction
+        }
+
+        with patch.object(client, "_fetch_feed", return_value=b"feed-v1"), patch.object(
+            client, "_build_arrivals_index", return_value=index
+        ) as mock_build:
+            north = client.get_arrivals_for_stop("127N", feed_urls=["http://test"])
+            both = client.get_arrivals_for_stop(
+                "127", feed_urls=["http://test"], related_stop_ids=["127N", "127S"]
+            )
+            stale = client.get_arrivals_for_stop("631N", feed_urls=["http://test"])
+
+            self.assertEqual(mock_build.call_count, 1)
+
+            # New bytes for the same feed invalidate the index
+            client._get_arrivals_index("http://test", b"feed-v2")
+            self.assertEqual(mock_build.call_count, 2)
+
+        self.assertEqual([t.trip_id for t in north], ["trip-1"])
+        self.assertEqual(north[0].minutes_away, 5)
+        self.assertEqual([t.trip_id for t in both], ["trip-2", "trip-1"])
+        self.assertEqual(stale, [])
+
+    def _fetch_concurrently(self, client, url, callers=8):
+        """Call client._fetch_feed(url) from several threads at once; return results and errors."""
+        start = threading.Barrier(callers)
+        results, errors = [], []
+
+        def call():
+            start.wait()
+            try:
+                results.append(client._fetch_feed(url))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return results, errors
+
+    @patch("traintrack.mta_client.urlopen")
+    def test_concurrent_fetches_share_one_request(self, mock_urlopen):
+        """Test that concurrent cache misses for one feed make a single request and parse."""
+        client = MTAClient()
+        calls = []
+
+        def slow_urlopen(url, **kwargs):
+            calls.append(url)
+            time.sleep(0.2)
+            response = MagicMock()
+            response.read.return_value = b"feed-data"
+            response.__enter__.return_value = response
+            return response
+
+        mock_urlopen.side_effect = slow_urlopen
+        results, errors = self._fetch_concurrently(client, "http://test")
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [b"feed-data"] * 8)
+
+        # The parse is coalesced the same way
+        def slow_build(feed_data):
+            time.sleep(0.2)
+            return {}
+
+        with patch.object(client, "_build_arrivals_index", side_effect=slow_build) as mock_build:
+            threads = [
+                threading.Thread(target=client._get_arrivals_index, args=("http://test", b"feed-data"))
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+        self.assertEqual(mock_build.call_count, 1)
+
+    @patch("traintrack.mta_client.urlopen")
+    def test_concurrent_fetches_share_one_failure(self, mock_urlopen):
+        """Test that callers waiting on a failed fetch get its error instead of retrying."""
+        client = MTAClient()
+        calls = []
+
+        def failing_urlopen(url, **kwargs):
+            calls.append(url)
+            time.sleep(0.2)
+            raise OSError("connection reset")
+
+        mock_urlopen.side_effect = failing_urlopen
+        results, errors = self._fetch_concurrently(client, "http://test")
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 8)
+        self.assertTrue(all(isinstance(e, OSError) for e in errors))
+
+        # Nothing is left in flight, so the next call tries again
+        mock_urlopen.side_effect = None
+        mock_urlopen.return_value.__enter__.return_value.read.return_value = b"recovered"
+        self.assertEqual(client._fetch_feed("http://test"), b"recovered")
+
+    def test_executor_created_once_under_concurrency(self):
+        """Test that simultaneous first users of the worker pool share one executor."""
+        client = MTAClient()
+        real_executor = ThreadPoolExecutor
+
+        def slow_executor(*args, **kwargs):
+            time.sleep(0.05)  # Widen the window between the None check and assignment
+            return real_executor(*args, **kwargs)
+
+        executors = []
+        with patch("traintrack.mta_client.ThreadPoolExecutor", side_effect=slow_executor) as mock_executor:
+            threads = [threading.Thread(target=lambda: executors.append(client.executor)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=5)
+        client.close()
+
+        self.assertEqual(mock_executor.call_count, 1)
+        self.assertEqual(len(executors), 8)
+        self.assertTrue(all(executor is executors[0] for executor in executors))
+
+    @patch("traintrack.mta_client.urlopen")
+    def test_stale_while_revalidate(self, mock_urlopen):
+        """Test that stale feeds are served at once and refreshed in the background."""
+        # Keep the circuit breaker out of the way of the two deliberate failures
+        client = MTAClient(stale_while_revalidate=True, max_staleness=120, failure_threshold=3)
+        client._cache["http://test"] = (b"old", time.time() - 60)
+        self.assertGreaterEqual(client.feed_age("http://test"), 60)
+
+        # A failed refresh keeps the stale copy in service
+        mock_urlopen.side_effect = OSError("network down")
+        self.assertEqual(client._fetch_feed("http://test"), b"old")
+        self.assertTrue(client.wait_for_refreshes(timeout=5))
+        self.assertEqual(client._fetch_feed("http://test"), b"old")
+        self.assertTrue(client.wait_for_refreshes(timeout=5))
+
+        # A successful refresh replaces it without blocking the caller
+        release = threading.Event()
+
+        def slow_urlopen(url, **kwargs):
+            release.wait(5)
+            response = MagicMock()
+            response.read.return_value = b"new"
+            response.__enter__.return_value = response
+            return response
+
+        mock_urlopen.side_effect = slow_urlopen
+        self.assertEqual(client._fetch_feed("http://test"), b"old")
+        release.set()
+        self.assertTrue(client.wait_for_refreshes(timeout=5))
+        self.assertEqual(client._fetch_feed("http://test"), b"new")
+        self.assertLess(client.data_age(["http://test", "http://other"]), 5)
+
+        # Past max_staleness the cached copy is not served
+        client._cache["http://test"] = (b"ancient", time.time() - 600)
+        mock_urlopen.side_effect = OSError("network down")
+        with self.assertRaises(OSError):
+            client._fetch_feed("http://test")
+        client.close()
+
+    @patch("traintrack.mta_client.urlopen")
+    def test_expired_feed_blocks_without_stale_while_revalidate(self, mock_urlopen):
+        """Test that the default mode refetches expired feeds before returning."""
+        client = MTAClient()
+        client._cache["http://test"] = (b"old", time.time() - 60)
+        mock_urlopen.return_value.__enter__.return_value.read.return_value = b"new"
+
+        self.assertEqual(client._fetch_feed("http://test"), b"new")
+        self.assertIsNone(client.feed_age("http://missing"))
+
+    def test_pooled_transport_reuses_connections(self):
+        """Test that the pooled transport keeps one connection alive across fetches."""
+        transport = PooledHTTPTransport()
+        with StandInServer(b"feed-data") as server:
+            client = MTAClient(transport=transport)
+            client._cache_ttl = 0  # Force a download per call
+            for _ in range(3):
+                self.assertEqual(client._fetch_feed(server.url), b"feed-data")
+            client.close()
+
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(len(server.connections), 1)
+
+    def test_pooled_transport_reconnects_dropped_connection(self):
+        """Test that a request on a dropped idle connection is retried on a new one."""
+        transport = PooledHTTPTransport()
+        with StandInServer(b"feed-data") as server:
+            self.assertEqual(transport.get(server.url).body, b"feed-data")
+
+            # Kill the pooled connection as an idle timeout on the server would
+            (idle,) = [conn for pool in transport._idle.values() for conn in pool]
+            idle.sock.shutdown(socket.SHUT_RDWR)
+
+            response = transport.get(server.url)
+        transport.close()
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.body, b"feed-data")
+        self.assertEqual(response.headers["etag"], '"v1"')
+        self.assertEqual(len(server.connections), 2)
+
+    def test_pooled_transport_does_not_retry_timeouts(self):
+        """Test that a timeout on a reused connection is raised at once, not retried."""
+        transport = PooledHTTPTransport()
+        with StandInServer(b"feed-data") as server:
+            self.assertEqual(transport.get(server.url).body, b"feed-data")
+
+            server.hang = True
+            start = time.monotonic()
+            with self.assertRaises(socket.timeout):
+                transport.get(server.url, timeout=0.5)
+            elapsed = time.monotonic() - start
+            # The timed-out connection is closed, not pooled
+            self.assertEqual([conn for pool in transport._idle.values() for conn in pool], [])
+        transport.close()
+
+        self.assertLess(elapsed, 0.9)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_unexpected_status_is_a_failed_fetch(self):
+        """Test that a redirect the transport does not follow is not cached as the feed."""
+        client = MTAClient(transport=PooledHTTPTransport())
+        with StandInServer(b"<html>moved</html>") as server:
+            server.status = 302
+            with self.assertRaises(HTTPError) as raised:
+                client._fetch_feed(server.url)
+        client.close()
+
+        self.assertEqual(raised.exception.code, 302)
+        self.assertIsNone(client.feed_age(server.url))
+        self.assertEqual(client.feed_health()[server.url].consecutive_failures, 1)
+
+    def test_conditional_gzip_feed_fetch(self):
+        """Test gzip negotiation and that a 304 reuses the cached bytes and parsed index."""
+        payload = b"feed-data" * 100
+        for transport in (None, PooledHTTPTransport()):
+            with StandInServer(payload, compress=True) as server:
+                client = MTAClient(transport=transport)
+                client._cache_ttl = 0  # Force a request per call
+
+                with patch.object(client, "_build_arrivals_index", return_value={}) as mock_build:
+                    first = client._fetch_feed(server.url)
+                    client._get_arrivals_index(server.url, first)
+                    second = client._fetch_feed(server.url)
+                    client._get_arrivals_index(server.url, second)
+
+                    # A changed feed is downloaded and parsed again
+                    server.body = b"new-feed-data"
+                    server.etag = '"v2"'
+                    third = client._fetch_feed(server.url)
+                    client._get_arrivals_index(server.url, third)
+                client.close()
+
+            self.assertEqual(first, payload)
+            self.assertIs(second, first)
+            self.assertEqual(third, b"new-feed-data")
+            self.assertEqual(mock_build.call_count, 2)
+            self.assertEqual(server.requests[0]["Accept-Encoding"], "gzip")
+            self.assertNotIn("If-None-Match", server.requests[0])
+            self.assertEqual(server.requests[1]["If-None-Match"], '"v1"')
+
+    @patch("traintrack.mta_client.urlopen")
+    def test_circuit_breaker_isolates_failing_feed(self, mock_urlopen):
+        """Test that a failing feed is skipped for a jittered backoff while others still fetch."""
+        client = MTAClient(failure_threshold=2, backoff_base=10.0)
+        client._cache_ttl = 0  # Force a request per call
+
+        def urlopen_by_url(request, **kwargs):
+            if "bad" in request.full_url:
+                raise OSError("timed out")
+            response = MagicMock()
+            response.__enter__.return_value.read.return_value = b"good-data"
+            return response
+
+        mock_urlopen.side_effect = urlopen_by_url
+        for _ in range(2):
+            feeds = client._fetch_feeds(["http://bad", "http://good"], deadline=5)
+            self.assertEqual(feeds, {"http://good": b"good-data"})
+
+        health = client.feed_health()
+        self.assertEqual(health["http://bad"].state, "open")
+        self.assertEqual(health["http://bad"].consecutive_failures, 2)
+        self.assertEqual(health["http://bad"].last_error, "timed out")
+        self.assertTrue(time.time() + 4 < health["http://bad"].retry_at <= time.time() + 10)
+        self.assertEqual(health["http://good"].state, "closed")
+        self.assertEqual(health[MTA_FEEDS["1"]].state, "closed")
+
+        # While open the bad feed is not requested at all
+        calls = mock_urlopen.call_count
+        with self.assertRaises(CircuitOpenError):
+            client._fetch_feed("http://bad")
+        self.assertEqual(client._fetch_feed("http://good"), b"good-data")
+        self.assertEqual(mock_urlopen.call_count, calls + 1)
+
+        # After the window a failed probe doubles the backoff
+        client._health["http://bad"].retry_at = time.time() - 1
+        with self.assertRaises(OSError):
+            client._fetch_feed("http://bad")
+        health = client.feed_health()["http://bad"]
+        self.assertEqual(health.state, "open")
+        self.assertTrue(time.time() + 9 < health.retry_at <= time.time() + 20)
+
+        # ...and a successful probe closes the circuit
+        client._health["http://bad"].retry_at = time.time() - 1
+        mock_urlopen.side_effect = None
+        mock_urlopen.return_value.__enter__.return_value.read.return_value = b"recovered"
+        self.assertEqual(client._fetch_feed("http://bad"), b"recovered")
+        health = client.feed_health()["http://bad"]
+        self.assertEqual(health.state, "closed")
+        self.assertEqual(health.consecutive_failures, 0)
+        self.assertIsNotNone(health.last_success)
+        client.close()
+
+    def test_alerts_index_parsed_once_per_payload(self):
+        """Test that alerts are answered from an index built once per feed payload."""
+        client = MTAClient()
+        index = (
+            [("1/2 delays", ("1", "2")), ("L suspended", ("L",)), ("2 only", ("2",))],
+            {"1": [0], "2": [0, 2], "L": [1]},
+        )
+
+        with patch.object(client, "_fetch_feed", return_value=b"alerts-v1"), patch.object(
+            client, "_build_alerts_index", return_value=index
+        ) as mock_build:
+            first = client.get_alerts_for_routes(["2", "1"])
+            second = client.get_alerts_for_routes(["L"])
+            none = client.get_alerts_for_routes(["7"])
+
+            self.assertEqual(mock_build.call_count, 1)
+
+        # Each alert appears once, in feed order, tagged with its first requested route
+        self.assertEqual([(a.route_id, a.message) for a in first], [("1", "1/2 delays"), ("2", "2 only")])
+        self.assertEqual([(a.route_id, a.message) for a in second], [("L", "L suspended")])
+        self.assertEqual(none, [])
+
+    def test_arrivals_for_many_stops_fetch_each_feed_once(self):
+        """Test that a batch lookup fetches and indexes each feed once for all groups."""
+        client = MTAClient()
+        now = int(time.time())
+        indexes = {
+            b"ace": {"A27N": [("A", 1, now + 120, "a-1")], "A27S": [("C", 0, now + 240, "c-1")]},
+            b"nums": {"127N": [("1", 1, now + 60, "1-1")], "127S": [("2", 0, now + 180, "2-1")]},
+        }
+
+        with patch.object(client, "_fetch_feed", side_effect=lambda url: url.encode()) as mock_fetch, \
+                patch.object(client, "_build_arrivals_index", side_effect=indexes.get) as mock_build:
+            results = client.get_arrivals_for_stops(
+                {"127": ["127N", "127S"], "A27": ["A27N", "A27S"], "127N": ["127N"]},
+                feed_urls=["ace", "nums"],
+            )
+        client.close()
+
+        self.assertEqual(mock_fetch.call_count, 2)
+        self.assertEqual(mock_build.call_count, 2)
+        self.assertEqual([t.trip_id for t in results["127"]], ["1-1", "2-1"])
+        self.assertEqual([t.trip_id for t in results["A27"]], ["a-1", "c-1"])
+        self.assertEqual([t.trip_id for t in results["127N"]], ["1-1"])
+
+    def test_feed_urls_for_routes(self):
+        """Test that only the feeds carrying the requested routes are selected."""
+        self.assertEqual(MTAClient.feed_urls_for_routes(["L"]), [MTA_FEEDS["6"]])
+        self.assertEqual(
+            MTAClient.feed_urls_for_routes(["A", "1", "C"]),
+            [MTA_FEEDS["1"], MTA_FEEDS["7"]],
+        )
+
+        # Unknown routes and empty lists fall back to all feeds
+        self.assertIsNone(MTAClient.feed_urls_for_routes(["UNKNOWN"]))
+        self.assertIsNone(MTAClient.feed_urls_for_routes([]))
+
     @staticmethod
     def _create_mock_protobuf() -> bytes:
         """Create a minimal mock GTFS-Realtime protobuf."""
@@ -152,6 +931,32 @@ class TestMTAStationTracker(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.tracker.get_station("NONEXISTENT")
 
+    def test_get_station_prefers_best_match_and_tolerates_typos(self):
+        """Test that name lookups pick the best ranked match and fall back to fuzzy matching."""
+        self.tracker.gtfs_loader.stations["R16"] = Station(
+            stop_id="R16", name="Times Sq", latitude=40.7546, longitude=-73.9867, lines=["N"]
+        )
+        self.tracker.gtfs_loader.stations_by_name["Times Sq"] = ["R16"]
+
+        self.assertEqual(self.tracker.get_station("times sq").stop_id, "R16")
+        self.assertEqual(self.tracker.get_station("Tims Sq-42").name, "Times Sq-42 St")
+
+    def test_get_station_rejects_weak_fuzzy_matches(self):
+        """Test that unrelated input raises instead of resolving to a weak fuzzy match."""
+        self.tracker.gtfs_loader._load_stops(
+            "stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station\n"
+            "626,86 St,40.785672,-73.95107,1,\n"
+            "621,125 St,40.804138,-73.937594,1,\n"
+            "A15,125 St,40.811109,-73.952343,1,\n"
+        )
+
+        for station_input in ("xyz st", "127X", "1270"):
+            with self.assertRaises(ValueError):
+                self.tracker.get_station(station_input)
+        self.assertEqual(self.tracker.get_station("86 Stt").stop_id, "626")
+        # The explicit fuzzy API keeps its lenient default
+        self.assertEqual(self.tracker.gtfs_loader.fuzzy_find_stations("xyz st")[0][0].stop_id, "626")
+
     def test_find_stations_by_name(self):
         """Test finding multiple stations by name."""
         results = self.tracker.find_stations_by_name("Times")
@@ -200,6 +1005,44 @@ class TestMTAStationTracker(unittest.TestCase):
         # Uptown should have train 1
         self.assertEqual(len(arrivals["Uptown"]), 1)
 
+    @patch.object(MTAClient, "get_arrivals_for_stop")
+    def test_get_arrivals_fetches_only_station_feeds(self, mock_get_arrivals):
+        """Test that the tracker only requests feeds serving the station's lines."""
+        mock_get_arrivals.return_value = []
+
+        station = self.tracker.get_station("127N")
+        self.tracker.get_arrivals(station)
+
+        _, kwargs = mock_get_arrivals.call_args
+        self.assertEqual(kwargs["feed_urls"], [MTA_FEEDS["7"]])
+
+    @patch.object(MTAClient, "get_arrivals_for_stops")
+    def test_get_arrivals_many_groups_per_station(self, mock_get_arrivals):
+        """Test that a batch of stations is served from one client call."""
+        current_time = int(time.time())
+        self.tracker.gtfs_loader.stations["L06"] = Station(
+            stop_id="L06", name="1 Av", latitude=40.730953, longitude=-73.981628, lines=["L"]
+        )
+        mock_get_arrivals.return_value = {
+            "127N": [Train("1", 1, current_time + 300, 5, "Van Cortlandt Park")],
+            "L06": [
+                Train("L", 0, current_time + 120, 2, "Canarsie"),
+                Train("L", 1, current_time + 60, 1, "8 Av"),
+            ],
+        }
+
+        stations = [self.tracker.get_station("127N"), self.tracker.get_station("L06")]
+        arrivals = self.tracker.get_arrivals_many(stations)
+
+        mock_get_arrivals.assert_called_once()
+        _, kwargs = mock_get_arrivals.call_args
+        self.assertEqual(kwargs["feed_urls"], [MTA_FEEDS["6"], MTA_FEEDS["7"]])
+        self.assertEqual(arrivals["127N"], {"Uptown": [("1", 5, "Van Cortlandt Park")]})
+        self.assertEqual(
+            arrivals["L06"],
+            {"Brooklyn-bound": [("L", 2, "Canarsie")], "Manhattan-bound": [("L", 1, "8 Av")]},
+        )
+
     @patch.object(MTAClient, "get_alerts_for_routes")
     def test_get_alerts(self, mock_get_alerts):
         """Test retrieving service alerts."""
@@ -216,6 +1059,114 @@ class TestMTAStationTracker(unittest.TestCase):
         self.assertEqual(alerts[0].route_id, "1")
         mock_get_alerts.assert_called_once()
 
+    def test_refresh_gtfs_swaps_only_changed_data(self):
+        """Test that a GTFS refresh builds a new loader and swaps it in atomically."""
+        with tempfile.TemporaryDirectory() as cache_dir, StandInServer(make_gtfs_zip()) as server:
+            tracker = MTAStationTracker(load_gtfs=False, cache_dir=cache_dir)
+            old_loader = tracker.gtfs_loader
+
+            self.assertTrue(tracker.refresh_gtfs(server.url))
+            loaded = tracker.gtfs_loader
+            self.assertIsNot(loaded, old_loader)
+            self.assertEqual(old_loader.stations, {})  # Old index left untouched
+            self.assertIn("L06", loaded.stations)
+
+            # Unchanged feed keeps the current loader
+            self.assertFalse(tracker.refresh_gtfs(server.url))
+            self.assertIs(tracker.gtfs_loader, loaded)
+
+            # A changed feed is picked up by the background refresher
+            server.body = make_gtfs_zip(stops=SAMPLE_STOPS.replace("1 Av", "First Av"))
+            server.etag = '"v2"'
+            tracker.start_background_refresh(interval=0.05, url=server.url)
+            deadline = time.monotonic() + 5
+            while tracker.gtfs_loader is loaded and time.monotonic() < deadline:
+                time.sleep(0.05)
+            tracker.stop_background_refresh()
+
+        self.assertEqual(tracker.get_station("L06").name, "First Av")
+
+    @patch("traintrack.mta_client.urlopen")
+    def test_station_data_shares_main_feed_fetch(self, mock_urlopen):
+        """Test that concurrent arrivals and alerts lookups download the main feed once."""
+        def slow_urlopen(url, **kwargs):
+            time.sleep(0.3)
+            response = MagicMock()
+            response.__enter__.return_value.read.return_value = b""
+            return response
+
+        mock_urlopen.side_effect = slow_urlopen
+        get_alerts = self.tracker.get_alerts
+        alert_threads = []
+
+        def record_alerts_thread(station):
+            alert_threads.append(threading.current_thread())
+            return get_alerts(station)
+
+        start = time.monotonic()
+        with patch.object(self.tracker, "get_alerts", side_effect=record_alerts_thread):
+            station_data = self.tracker.get_station_data("127N")
+        elapsed = time.monotonic() - start
+
+        self.assertEqual([c.args[0].full_url for c in mock_urlopen.call_args_list], [MTA_FEEDS["7"]])
+        self.assertLess(elapsed, 0.55)
+        self.assertEqual(station_data.station.stop_id, "127N")
+        # Alerts run on the client's shared worker pool, not a thread made per call
+        self.assertTrue(alert_threads[0].name.startswith("mta-feed"))
+
+    def test_subscriptions_share_polls_and_skip_unchanged(self):
+        """Test that one poll serves every subscriber and unchanged arrivals are not re-sent."""
+        uptown = {"Uptown": [("1", 5, "Van Cortlandt Park")]}
+        later = {"Uptown": [("1", 4, "Van Cortlandt Park")]}
+        received = []
+
+        def record(name):
+            return lambda station, arrivals: received.append((name, station.stop_id, arrivals))
+
+        polls = [
+            {"127": uptown, "127N": uptown},
+            {"127": uptown, "127N": uptown},
+            {"127": later, "127N": uptown},
+        ]
+        # Drive polls by hand instead of from the poller thread
+        with patch.object(self.tracker, "get_arrivals_many", side_effect=polls) as mock_many, patch.object(
+            self.tracker, "_poll_loop"
+        ):
+            self.tracker.subscribe("127", record("a"))
+            self.tracker.subscribe("127", record("b"))
+            self.tracker.subscribe("127N", record("c"))
+
+            self.tracker._poll_subscriptions()
+            self.assertEqual(
+                received, [("a", "127", uptown), ("b", "127", uptown), ("c", "127N", uptown)]
+            )
+
+            received.clear()
+            self.tracker._poll_subscriptions()
+            self.assertEqual(received, [])
+
+            self.tracker._poll_subscriptions()
+            self.assertEqual(received, [("a", "127", later), ("b", "127", later)])
+
+        # One batched fetch per poll, covering each station once
+        self.assertEqual(mock_many.call_count, 3)
+        self.assertEqual(sorted(s.stop_id for s in mock_many.call_args.args[0]), ["127", "127N"])
+
+    def test_subscribe_delivers_from_background_poller(self):
+        """Test that the poller thread delivers the first update promptly and stops when idle."""
+        self.tracker.poll_interval = 60
+        delivered = threading.Event()
+        arrivals = {"Downtown": [("2", 3, "Flatbush Av")]}
+
+        with patch.object(self.tracker, "get_arrivals_many", return_value={"127": arrivals}):
+            token = self.tracker.subscribe("127", lambda station, trains: delivered.set())
+            self.assertTrue(delivered.wait(5))
+            poller = self.tracker._poll_thread
+            self.tracker.unsubscribe(token)
+
+        self.assertFalse(poller.is_alive())
+        self.assertIsNone(self.tracker._poll_thread)
+
     def test_direction_labels(self):
         """Test direction label generation for various routes."""
         # Numbered lines
@@ -298,5 +1249,381 @@ class TestIntegration(unittest.TestCase):
         self.assertIsInstance(station_data.last_updated, datetime)
 
 
+class FakeAsyncTransport:
+    """Async transport serving fixed bodies per URL, counting requests."""
+
+    def __init__(self, bodies, delay=0.05):
+        self.bodies = bodies
+        self.delay = delay
+        self.requests = []
+
+    async def get(self, url, headers=None, timeout=10.0):
+        self.requests.append(url)
+        await asyncio.sleep(self.delay)
+        if url not in self.bodies:
+            raise OSError(f"no route to {url}")
+        return TransportResponse(200, {}, self.bodies[url])
+
+
+class TestAsyncAPI(unittest.TestCase):
+    """Test the asyncio client and tracker."""
+
+    def setUp(self):
+        """Set up a tracker over the sample GTFS data."""
+        self.tracker = AsyncMTAStationTracker(load_gtfs=False, cache_dir=None)
+        load_sample_gtfs(self.tracker)
+
+    def test_concurrent_requests_share_fetch_and_parse(self):
+        """Test that overlapping coroutines fetch and parse each feed once."""
+        now = int(time.time())
+        transport = FakeAsyncTransport({MTA_FEEDS["1"]: b"feed-1", MTA_FEEDS["6"]: b"feed-l"})
+        client = AsyncMTAClient(async_transport=transport)
+        indexes = {
+            b"feed-1": {"127N": [("1", 1, now + 300, "trip-1")]},
+            b"feed-l": {"L06S": [("L", 0, now + 120, "trip-l")]},
+        }
+
+        async def run():
+            return await asyncio.gather(
+                client.get_arrivals_for_stop("127", feed_urls=[MTA_FEEDS["1"]], related_stop_ids=["127N", "127S"]),
+                client.get_arrivals_for_stops(
+                    {"127": ["127N"], "L06": ["L06S"]}, feed_urls=[MTA_FEEDS["1"], MTA_FEEDS["6"]]
+                ),
+            )
+
+        with patch.object(client, "_build_arrivals_index", side_effect=indexes.get) as mock_build:
+            single, many = asyncio.run(run())
+        client.close()
+
+        self.assertEqual(sorted(transport.requests), sorted([MTA_FEEDS["1"], MTA_FEEDS["6"]]))
+        self.assertEqual(mock_build.call_count, 2)
+        self.assertEqual([t.trip_id for t in single], ["trip-1"])
+        self.assertEqual([t.trip_id for t in many["127"]], ["trip-1"])
+        self.assertEqual([t.trip_id for t in many["L06"]], ["trip-l"])
+
+    def test_default_transport_against_stand_in(self):
+        """Test the default (worker pool) transport, including 304 revalidation."""
+        client = AsyncMTAClient()
+        client._cache_ttl = 0  # Force a request per call
+        with StandInServer(b"feed-data", compress=True) as server:
+            first = asyncio.run(client._fetch_feed_async(server.url))
+            second = asyncio.run(client._fetch_feed_async(server.url))
+        client.close()
+
+        self.assertEqual(first, b"feed-data")
+        self.assertIs(second, first)
+        self.assertEqual(server.requests[1]["If-None-Match"], '"v1"')
+
+    def test_failed_feed_is_left_out(self):
+        """Test that a failing feed drops out of the results without failing the call."""
+        transport = FakeAsyncTransport({MTA_FEEDS["1"]: b"feed-1"})
+        client = AsyncMTAClient(async_transport=transport)
+
+        with patch.object(client, "_build_arrivals_index", return_value={}):
+            feeds = asyncio.run(client._fetch_feeds_async([MTA_FEEDS["1"], "http://down"], deadline=5))
+        client.close()
+
+        self.assertEqual(feeds, {MTA_FEEDS["1"]: b"feed-1"})
+        self.assertEqual(client.feed_health()["http://down"].consecutive_failures, 1)
+
+    def test_cancelled_caller_does_not_cancel_shared_fetch(self):
+        """Test that cancelling the first caller leaves coalesced callers their result."""
+        transport = FakeAsyncTransport({MTA_FEEDS["1"]: b"feed-1"}, delay=0.1)
+        client = AsyncMTAClient(async_transport=transport)
+
+        async def run():
+            first = asyncio.ensure_future(client._fetch_feed_async(MTA_FEEDS["1"]))
+            second = asyncio.ensure_future(client._fetch_feed_async(MTA_FEEDS["1"]))
+            await asyncio.sleep(0.02)
+            first.cancel()
+            return await asyncio.gather(first, second, return_exceptions=True)
+
+        first, second = asyncio.run(run())
+        client.close()
+
+        self.assertIsInstance(first, asyncio.CancelledError)
+        self.assertEqual(second, b"feed-1")
+        self.assertEqual(transport.requests, [MTA_FEEDS["1"]])
+
+    def test_late_feed_errors_are_consumed(self):
+        """Test that a feed failing after the deadline leaves no unretrieved task exception."""
+        transport = FakeAsyncTransport({}, delay=0.1)
+        client = AsyncMTAClient(async_transport=transport)
+
+        async def run():
+            errors = []
+            asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+            feeds = await client._fetch_feeds_async(["http://down"], deadline=0.02)
+            await asyncio.sleep(0.2)  # Let the download fail
+            gc.collect()
+            return feeds, errors
+
+        feeds, errors = asyncio.run(run())
+        client.close()
+
+        self.assertEqual(feeds, {})
+        self.assertEqual(errors, [])
+        self.assertEqual(client.feed_health()["http://down"].consecutive_failures, 1)
+
+    def test_subscription_polls_through_async_client(self):
+        """Test that subscribing from a running loop polls with the async client on that loop."""
+        now = int(time.time())
+        client = self.tracker.mta_client
+        loops = []
+        received = []
+
+        async def fake_arrivals(stop_groups, feed_urls=None, deadline=None):
+            loops.append(asyncio.get_running_loop())
+            return {key: [Train("L", 0, now + 240, 4, "Canarsie", "trip-l")] for key in stop_groups}
+
+        async def run():
+            self.tracker.subscribe("L06", lambda station, arrivals: received.append(arrivals))
+            for _ in range(100):
+                if received:
+                    break
+                await asyncio.sleep(0.02)
+            return asyncio.get_running_loop()
+
+        with patch.object(client, "get_arrivals_for_stops", side_effect=fake_arrivals):
+            loop = asyncio.run(run())
+        self.tracker.cleanup()
+
+        self.assertEqual(loops[:1], [loop])
+        self.assertEqual(list(received[0].values()), [[("L", 4, "Canarsie")]])
+
+    def test_get_station_data(self):
+        """Test that async station data matches the sync tracker's shape."""
+        now = int(time.time())
+        client = self.tracker.mta_client
+
+        async def fake_arrivals(stop_groups, feed_urls=None, deadline=None):
+            return {key: [Train("L", 0, now + 240, 4, "Canarsie", "trip-l")] for key in stop_groups}
+
+        async def fake_alerts(route_ids):
+            return [Alert(route_id="L", message="Weekend work", severity="WARNING")]
+
+        with patch.object(client, "get_arrivals_for_stops", side_effect=fake_arrivals), patch.object(
+            client, "get_alerts_for_routes", side_effect=fake_alerts
+        ):
+            station_data = asyncio.run(self.tracker.get_station_data("L06"))
+            many = asyncio.run(self.tracker.get_arrivals_many([self.tracker.get_station("127")]))
+        self.tracker.cleanup()
+
+        self.assertEqual(station_data.station.stop_id, "L06")
+        self.assertEqual(list(station_data.trains_by_direction.values()), [[("L", 4, "Canarsie")]])
+        self.assertEqual([a.message for a in station_data.alerts], ["Weekend work"])
+        self.assertEqual(list(many), ["127"])
+
+
+class TestArrivalsServer(unittest.TestCase):
+    """Test the HTTP/JSON arrivals server."""
+
+    def setUp(self):
+        """Start a server over the sample GTFS data."""
+        self.tracker = MTAStationTracker(load_gtfs=False, cache_dir=None)
+        load_sample_gtfs(self.tracker)
+        self.server = ArrivalsServer(self.tracker, host="127.0.0.1", port=0, cache_ttl=60)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.tracker.cleanup()
+
+    def get(self, path, headers=None):
+        """GET a path; return (status, headers, parsed JSON or None)."""
+        request = Request(self.server.url + path, headers=headers or {})
+        try:
+            with urlopen(request, timeout=5) as response:
+                return response.status, response.headers, json.loads(response.read())
+        except HTTPError as e:
+            body = e.read()
+            return e.code, e.headers, json.loads(body) if body else None
+
+    def test_stations(self):
+        """Test the station list."""
+        status, _, stations = self.get("/stations")
+        self.assertEqual(status, 200)
+        self.assertEqual([s["stop_id"] for s in stations], ["L06", "127"])
+        self.assertEqual(stations[1]["name"], "Times Sq-42 St")
+        self.assertEqual(stations[1]["lines"], ["1", "2"])
+
+    def test_arrivals_are_cached_and_revalidated(self):
+        """Test that arrivals bodies are rendered once and support If-None-Match."""
+        arrivals = {"Uptown": [("1", 5, "Van Cortlandt Park")]}
+        with patch.object(self.tracker, "get_arrivals", return_value=arrivals) as mock_arrivals:
+            status, headers, first = self.get("/stations/127/arrivals")
+            status_again, _, second = self.get("/stations/127/arrivals")
+            not_modified, _, _ = self.get("/stations/127/arrivals", {"If-None-Match": headers["ETag"]})
+
+        self.assertEqual((status, status_again, not_modified), (200, 200, 304))
+        self.assertEqual(mock_arrivals.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(first["station"]["stop_id"], "127")
+        self.assertEqual(
+            first["arrivals"],
+            {"Uptown": [{"route_id": "1", "minutes_away": 5, "destination": "Van Cortlandt Park"}]},
+        )
+
+    def test_alerts(self):
+        """Test alerts for all routes and filtered by route."""
+        alerts = [Alert(route_id="L", message="No L trains", severity="WARNING")]
+        with patch.object(self.tracker.mta_client, "get_alerts_for_routes", return_value=alerts) as mock_alerts:
+            _, _, everything = self.get("/alerts")
+            _, _, filtered = self.get("/alerts?routes=L,2")
+
+        self.assertEqual(everything, [{"route_id": "L", "message": "No L trains", "severity": "WARNING"}])
+        self.assertEqual(mock_alerts.call_args_list[0].args[0], ["1", "2", "L"])
+        self.assertEqual(mock_alerts.call_args_list[1].args[0], ["2", "L"])
+        self.assertEqual(filtered, everything)
+
+    def test_body_cache_is_keyed_and_bounded(self):
+        """Test that unused query strings share a body and the cache stays under its cap."""
+        with patch.object(server_module, "MAX_CACHED_BODIES", 4), patch.object(
+            self.server, "_render_stations", wraps=self.server._render_stations
+        ) as mock_stations:
+            for i in range(20):
+                self.assertEqual(self.server.get_body(f"/stations?x={i}"), self.server.get_body("/stations"))
+            for i in range(20):
+                self.server.get_body(f"/alerts?routes=R{i}")
+
+        self.assertEqual(mock_stations.call_count, 1)
+        self.assertEqual(len(self.server._bodies), 4)
+        self.assertEqual(self.server.get_body("/alerts?routes=L,2"), self.server.get_body("/alerts?routes=2,L,L"))
+
+    def test_concurrent_misses_render_once(self):
+        """Test that simultaneous requests for an uncached body wait for one render."""
+        arrivals = {"Uptown": [("1", 5, "Van Cortlandt Park")]}
+
+        def slow_arrivals(station):
+            time.sleep(0.2)
+            return arrivals
+
+        with patch.object(self.tracker, "get_arrivals", side_effect=slow_arrivals) as mock_arrivals:
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(self.server.get_body("/stations/127/arrivals")))
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=5)
+
+        self.assertEqual(mock_arrivals.call_count, 1)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(len(set(results)), 1)
+
+    def test_not_found(self):
+        """Test unknown stations and paths."""
+        self.assertEqual(self.get("/stations/NOPE/arrivals")[0], 404)
+        self.assertEqual(self.get("/trains")[0], 404)
+
+    def test_stream_sends_snapshot_then_diffs(self):
+        """Test the SSE stream: a snapshot, a diff per change, and cleanup on disconnect."""
+        state = {
+            "127": {"Uptown": [("1", 5, "Van Cortlandt Park")]},
+            "L06": {"Manhattan-bound": [("L", 2, "8 Av")]},
+        }
+
+        def arrivals_many(stations):
+            return {station.stop_id: state[station.stop_id] for station in stations}
+
+        def read_event(response):
+            lines = []
+            while True:
+                line = response.readline().decode("utf-8").rstrip("\n")
+                if not line:
+                    if lines:
+                        return lines[0].split(": ", 1)[1], json.loads(lines[1].split(": ", 1)[1])
+                    continue
+                if not line.startswith(":"):
+                    lines.append(line)
+
+        self.tracker.poll_interval = 0.1
+        host, port = self.server._httpd.server_address[:2]
+        with patch.object(self.tracker, "get_arrivals_many", side_effect=arrivals_many), patch.object(
+            server_module, "STREAM_KEEPALIVE", 0.2
+        ):
+            conn = http.client.HTTPConnection(host, port, timeout=5)
+            conn.request("GET", "/stream?stations=127,L06")
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+
+            snapshots = {}
+            for _ in range(2):
+                event, payload = read_event(response)
+                self.assertEqual(event, "snapshot")
+                snapshots[payload["stop_id"]] = payload["arrivals"]
+            self.assertEqual(
+                snapshots["127"],
+                {"Uptown": [{"route_id": "1", "minutes_away": 5, "destination": "Van Cortlandt Park"}]},
+            )
+
+            state["127"] = {"Uptown": [("1", 4, "Van Cortlandt Park")]}
+            event, payload = read_event(response)
+            self.assertEqual(event, "diff")
+            self.assertEqual(payload["stop_id"], "127")
+            self.assertEqual(
+                payload["changed"],
+                [{"direction": "Uptown", "route_id": "1", "destination": "Van Cortlandt Park",
+                  "minutes_away": 4, "was": 5}],
+            )
+            self.assertEqual((payload["added"], payload["removed"]), ([], []))
+
+            # Both stations share the tracker's one poller
+            self.assertEqual(len(self.tracker._subscriptions), 2)
+            response.close()
+            conn.close()
+
+            deadline = time.monotonic() + 5
+            while self.tracker._subscriptions and time.monotonic() < deadline:
+                time.sleep(0.05)
+        self.assertEqual(self.tracker._subscriptions, {})
+
+    def test_main_client_revalidates_every_poll(self):
+        """Test that the server's client refreshes feeds on every stream poll."""
+        with patch.object(server_module, "MTAStationTracker") as mock_tracker, patch.object(
+            server_module, "ArrivalsServer"
+        ):
+            server_module.main(["--poll-interval", "2"])
+
+        client = mock_tracker.call_args.kwargs["mta_client"]
+        client.close()
+        self.assertFalse(client._stale_while_revalidate)
+        self.assertLess(client._cache_ttl, 2)
+        self.assertEqual(mock_tracker.return_value.poll_interval, 2)
+
+    def test_stream_unknown_station(self):
+        """Test that streaming an unknown station is a 404."""
+        self.assertEqual(self.get("/stream?stations=NOPE")[0], 404)
+
+
+class TestDiffArrivals(unittest.TestCase):
+    """Test the stream's arrival diffs."""
+
+    def test_diff_arrivals(self):
+        """Test that departures, new trains and countdowns produce a compact diff."""
+        old = {"Uptown": [("1", 1, "Van Cortlandt Park"), ("1", 8, "Van Cortlandt Park"), ("2", 4, "Wakefield")]}
+        new = {
+            "Uptown": [("1", 7, "Van Cortlandt Park"), ("1", 15, "Van Cortlandt Park"), ("2", 4, "Wakefield")],
+            "Downtown": [("1", 3, "South Ferry")],
+        }
+
+        diff = diff_arrivals(old, new)
+
+        train = {"direction": "Uptown", "route_id": "1", "destination": "Van Cortlandt Park"}
+        self.assertEqual(diff["removed"], [dict(train, minutes_away=1)])
+        self.assertEqual(diff["changed"], [dict(train, minutes_away=7, was=8)])
+        self.assertEqual(
+            diff["added"],
+            [
+                {"direction": "Downtown", "route_id": "1", "destination": "South Ferry", "minutes_away": 3},
+                dict(train, minutes_away=15),
+            ],
+        )
+        self.assertEqual(diff_arrivals(new, new), {"added": [], "removed": [], "changed": []})
+
+
 if __name__ == "__main__":
     unittest.main()